@@ -0,0 +1,185 @@
+'''run.py
+Times the loading, parsing and enrichment of synthetic NTA data.
+
+Usage:
+    python benchmark/run.py --rows 10000 1000000
+    python benchmark/run.py --rows 10000 --save-baseline
+'''
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import synthetic
+from server import serve
+
+from cnparser.cache import DEFAULT_CACHE_DIR
+
+BENCHMARKS = ("read_csv", "zip_load", "standardization", "enrich_kana", "enrich")
+SIZES = {"10k": 10000, "1m": 1000000, "5m": 5000000}
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def prepare(rows: int, data_dir: str) -> dict:
+    """Generates the CSV and zip files of a size once and reuses them afterwards.
+
+    Args:
+        rows (int): The number of rows.
+        data_dir (str): The directory of the generated files.
+
+    Returns:
+        dict: The paths of the "csv" and "zip" files.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    paths = {"csv": os.path.join(data_dir, f"synthetic_{rows}.csv"),
+             "zip": os.path.join(data_dir, f"synthetic_{rows}.zip")}
+    if not os.path.exists(paths["zip"]):
+        print(f"Generating {rows} rows in {data_dir}", file=sys.stderr)
+        synthetic.write_csv(synthetic.generate(rows), paths["csv"])
+        synthetic.write_zip(paths["csv"], paths["zip"])
+    return paths
+
+def _measure(name: str, paths: dict) -> float:
+    """Runs one benchmark and returns the seconds spent in the measured step."""
+    import cnparser
+    from cnparser.enrich import enrich_kana, standardization
+    from cnparser.load import ZipLoader
+
+    if name == "zip_load":
+        with serve(paths["zip"]) as url:
+            start = time.perf_counter()
+            ZipLoader(url=url).zip_load("00")
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = cnparser.read_csv(paths["csv"])
+    if name == "read_csv":
+        return time.perf_counter() - start
+    step = {"standardization": standardization, "enrich_kana": enrich_kana, "enrich": cnparser.enrich}[name]
+    start = time.perf_counter()
+    step(df)
+    return time.perf_counter() - start
+
+def _worker(name, paths, queue):
+    """Runs a benchmark in a fresh process, so peak RSS and caches are not shared."""
+    seconds = _measure(name, paths)
+    queue.put((seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+def run(name: str, rows: int, paths: dict, repeat=5) -> dict:
+    """Runs one benchmark in spawned processes and keeps the fastest run.
+
+    Args:
+        name (str): The benchmark, one of BENCHMARKS.
+        rows (int): The number of rows in the input files.
+        paths (dict): The input files returned by prepare.
+        repeat (int): The number of runs. Defaults to 5.
+
+    Returns:
+        dict: The "seconds", "rows_per_sec" and "peak_rss_mb" of the fastest run.
+    """
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        queue = context.Queue()
+        process = context.Process(target=_worker, args=(name, paths, queue))
+        process.start()
+        runs.append(queue.get())
+        process.join()
+    seconds, max_rss = min(runs)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = max_rss / 1024 ** 2 if sys.platform == "darwin" else max_rss / 1024
+    return {"seconds": round(seconds, 4), "rows_per_sec": round(rows / seconds), "peak_rss_mb": round(rss, 1)}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Lists the benchmarks which are slower or use more memory than the baseline.
+
+    Args:
+        results (dict): The results by size and benchmark.
+        baseline (dict): The baseline in the same shape.
+        tolerance (float): The allowed relative regression, such as 0.2 for 20%.
+
+    Returns:
+        list of str: A description of each regression.
+    """
+    regressions = []
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if result["rows_per_sec"] < base["rows_per_sec"] * (1 - tolerance):
+                regressions.append(f"{size} {name}: {result['rows_per_sec']} rows/sec, "
+                                   f"baseline {base['rows_per_sec']}")
+            if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(f"{size} {name}: {result['peak_rss_mb']} MB peak RSS, "
+                                   f"baseline {base['peak_rss_mb']}")
+    return regressions
+
+def commit() -> str:
+    """Returns the short hash of the checked out commit, with "-dirty" if the cnparser package has changes.
+
+    Returns:
+        str: The commit, or None outside a git checkout.
+    """
+    try:
+        head = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--", "cnparser"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{head}-dirty" if status else head
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", nargs="+", default=["10k"],
+                        help="Sizes to run: 10k, 1m, 5m or a number of rows. Defaults to 10k.")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="Benchmarks to run. Defaults to all.")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per benchmark, keeping the fastest. Defaults to 5.")
+    parser.add_argument("--data-dir", default=os.path.join(DEFAULT_CACHE_DIR, "benchmark"),
+                        help="Directory of the generated input files.")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline JSON file to compare against.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Replace the baseline with the results, the commit and the row counts.")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Allowed relative regression before failing. Defaults to 0.3.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.rows:
+        rows = SIZES.get(size.lower()) or int(size)
+        paths = prepare(rows, args.data_dir)
+        results[str(rows)] = {}
+        for name in args.only:
+            result = run(name, rows, paths, args.repeat)
+            results[str(rows)][name] = result
+            print(f"{rows:>9} {name:<16} {result['seconds']:>9.3f} s {result['rows_per_sec']:>12,} rows/s "
+                  f"{result['peak_rss_mb']:>9.1f} MB")
+
+    if args.save_baseline:
+        baseline = {"commit": commit(), "rows": sorted(int(size) for size in results), "repeat": args.repeat,
+                    "results": results}
+        with open(args.baseline, "w", encoding="UTF-8") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, "r", encoding="UTF-8") as file:
+        baseline = json.load(file)
+    print(f"Baseline of commit {baseline['commit']} with {', '.join(map(str, baseline['rows']))} rows",
+          file=sys.stderr)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
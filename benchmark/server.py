@@ -0,0 +1,60 @@
+'''server.py
+A local stand-in for the NTA download endpoint.
+'''
+import contextlib
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOKEN_KEY = "jp.go.nta.houjin_bangou.framework.web.common.CNSFWTokenProcessor.request.token"
+TOKEN = "benchmark-token"
+PAGE = f"""<html><body><form>
+<input type="hidden" name="{TOKEN_KEY}" value="{TOKEN}" />
+</form></body></html>"""
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves the token page on GET and the zip file on POST, as the NTA site does."""
+    zip_path = None
+
+    def do_GET(self):
+        body = PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if TOKEN not in self.path:
+            self.send_error(403)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(os.path.getsize(self.zip_path)))
+        self.end_headers()
+        with open(self.zip_path, "rb") as file:
+            shutil.copyfileobj(file, self.wfile, 1024 * 1024)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+@contextlib.contextmanager
+def serve(zip_path: str):
+    """Serves a zip file on a local port for the duration of the context.
+
+    Args:
+        zip_path (str): The zip file returned for every download request.
+
+    Yields:
+        str: The URL to pass to ZipLoader.
+    """
+    handler = type("Handler", (_Handler,), {"zip_path": zip_path})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/download/zenken/"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,115 @@
+'''synthetic.py
+Generates synthetic data in the shape of the NTA full data (header.json).
+'''
+import os
+import sys
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from cnparser.utility import load_config  # noqa: E402
+
+PREFECTURES = [
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県", "茨城県", "栃木県", "群馬県",
+    "埼玉県", "千葉県", "東京都", "神奈川県", "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県",
+    "岐阜県", "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県", "奈良県", "和歌山県",
+    "鳥取県", "島根県", "岡山県", "広島県", "山口県", "徳島県", "香川県", "愛媛県", "高知県", "福岡県",
+    "佐賀県", "長崎県", "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県",
+]
+# Share of each prefecture, roughly following the number of corporations
+PREFECTURE_WEIGHTS = np.array([4, 1, 1, 2, 1, 1, 2, 2, 2, 2, 5, 4, 25, 6, 2, 1, 1, 1, 1, 2,
+                               2, 3, 6, 1, 1, 2, 8, 4, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 4,
+                               1, 1, 1, 1, 1, 1, 1], dtype=float)
+# kind code: (share, legal entity name written in the name)
+KINDS = {
+    "301": (0.55, "株式会社"), "302": (0.2, "有限会社"), "305": (0.08, "合同会社"), "304": (0.01, "合資会社"),
+    "399": (0.1, "一般社団法人"), "101": (0.005, ""), "201": (0.01, ""), "499": (0.045, ""),
+}
+WORDS = ["山田", "鈴木", "佐藤", "高橋", "田中", "中村", "東", "西", "南", "北", "日本", "大和", "富士",
+         "建設", "工業", "商事", "電気", "運輸", "不動産", "食品", "製作所", "興産", "物産", "技研", "産業",
+         "ホールディングス", "サービス", "コンサルティング", "システム", "ＡＢＣ", "ｓｏｕｖｅｎｉｒ", "Ｔ＆Ｍ"]
+KANA = ["ヤマダ", "スズキ", "サトウ", "タカハシ", "タナカ", "ケンセツ", "コウギョウ", "ショウジ", "デンキ", "ウンユ"]
+TOWNS = ["東町", "西町", "本町", "栄町", "中央", "緑町", "旭町", "大手町", "安来町", "天神町"]
+FULL_WIDTH = str.maketrans("0123456789", "０１２３４５６７８９")
+
+def generate(rows: int, seed=0) -> pd.DataFrame:
+    """Generates a DataFrame with the columns of header.json.
+
+    Args:
+        rows (int): The number of rows.
+        seed (int): The random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: The synthetic data with every column as strings.
+    """
+    rng = np.random.default_rng(seed)
+    header = load_config("header")
+    df = pd.DataFrame(index=range(rows), columns=header, dtype=object)
+
+    df["sequence_number"] = np.arange(1, rows + 1).astype(str)
+    df["corporate_number"] = _corporate_numbers(rng, rows)
+    df["process"] = rng.choice(["01", "11", "12", "21", "71"], rows, p=[0.8, 0.08, 0.08, 0.03, 0.01])
+    df["correct"] = rng.choice(["0", "1"], rows, p=[0.98, 0.02])
+    df["update_date"] = _dates(rng, rows, "2015-10-05", "2024-03-29")
+    df["change_date"] = _dates(rng, rows, "2015-10-05", "2024-03-29")
+
+    kinds = rng.choice(list(KINDS), rows, p=[share for share, _ in KINDS.values()])
+    suffixes = np.array([KINDS[code][1] for code in kinds], dtype=object)
+    first = rng.choice(WORDS, rows)
+    second = rng.choice(WORDS, rows)
+    prefix = rng.random(rows) < 0.6
+    body = pd.Series(first, dtype=object) + pd.Series(second, dtype=object)
+    suffix = pd.Series(suffixes, dtype=object)
+    df["name"] = np.where(prefix, suffix + body, body + suffix)
+    df["kind"] = kinds
+
+    prefecture = rng.choice(len(PREFECTURES), rows, p=PREFECTURE_WEIGHTS / PREFECTURE_WEIGHTS.sum())
+    df["prefecture_name"] = np.array(PREFECTURES, dtype=object)[prefecture]
+    df["prefecture_code"] = [f"{code + 1:02d}" for code in prefecture]
+    city = rng.integers(1, 60, rows)
+    df["city_name"] = [f"第{number}市" for number in city]
+    df["city_code"] = [f"{number * 2 + 99:03d}" for number in city]
+    chome = rng.integers(1, 10, rows)
+    banchi = rng.integers(1, 3000, rows)
+    town = rng.choice(TOWNS, rows)
+    df["street_number"] = [f"{t}{c}丁目{b}".translate(FULL_WIDTH) for t, c, b in zip(town, chome, banchi)]
+    post_codes = pd.Series([f"{code:07d}" for code in rng.integers(0, 10000000, rows)], dtype=object)
+    df["post_code"] = post_codes.where(rng.random(rows) < 0.9)
+
+    closed = rng.random(rows) < 0.05
+    df["close_date"] = pd.Series(_dates(rng, rows, "2016-01-01", "2024-03-29"), dtype=object).where(closed)
+    df["close_cause"] = pd.Series(rng.choice(["01", "11", "21", "31"], rows), dtype=object).where(closed)
+    df["assignment_date"] = "2015-10-05"
+    df["latest"] = "1"
+    df["en_name"] = pd.Series([f"Company {number}" for number in range(rows)], dtype=object).where(rng.random(rows) < 0.02)
+    kana = pd.Series(rng.choice(KANA, rows), dtype=object) + pd.Series(rng.choice(KANA, rows), dtype=object)
+    df["furigana"] = kana.where(rng.random(rows) < 0.3)
+    df["hihyoji"] = "0"
+    return df
+
+def write_csv(df: pd.DataFrame, path: str):
+    """Writes the data as an NTA CSV file, without a header and with quoted text."""
+    df.to_csv(path, header=False, index=False, encoding="utf-8")
+
+def write_zip(csv_path: str, zip_path: str):
+    """Writes an NTA-style zip archive containing the CSV file and a signature file."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(csv_path, f"{name}.csv")
+        archive.writestr(f"{name}.asc", "signature")
+
+def _corporate_numbers(rng, rows) -> np.ndarray:
+    """Generates distinct corporate numbers with valid check digits."""
+    base = rng.choice(10 ** 12, rows, replace=False)
+    powers = 10 ** np.arange(12, dtype=np.int64)
+    weights = np.where(np.arange(1, 13) % 2 == 1, 1, 2)
+    check = 9 - (((base[:, None] // powers) % 10) @ weights) % 9
+    return np.char.zfill((check * 10 ** 12 + base).astype(str), 13)
+
+def _dates(rng, rows, start, end) -> np.ndarray:
+    """Generates random dates as YYYY-MM-DD strings."""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    return dates.strftime("%Y-%m-%d").to_numpy(dtype=object)
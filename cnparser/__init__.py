@@ -3,5 +3,12 @@ Corporate Number Parser Library
 ~~~~~~~~~~~~~~~~~~~~~
 cnparser is a simple scraping library for Corporate Number Publication Site
 """
-from cnparser.load import load, read_csv
-from cnparser.enrich import enrich
\ No newline at end of file
+from cnparser.load import load, load_diff, read_csv, iter_load, iter_read_csv
+from cnparser.enrich import enrich, plan_enrich
+from cnparser.cache import ZipCache, KanaCache
+from cnparser.update import apply_updates
+from cnparser.snapshot import save_snapshot, open_snapshot
+from cnparser.index import CorporateIndex, validate_corporate_number
+from cnparser.search import NameIndex
+from cnparser.stats import Stats
+from cnparser.aio import aload, AsyncZipLoader
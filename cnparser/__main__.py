@@ -0,0 +1,54 @@
+'''__main__.py
+Command-line batch tool: python -m cnparser Tottori Shimane --enrich --output out
+'''
+import argparse
+import sys
+
+from cnparser.cache import KanaCache
+from cnparser.executor import EXECUTORS
+from cnparser.pipeline import FORMATS, report, run_pipeline
+
+def main(argv=None) -> int:
+    """Runs the download, parse, enrich and write pipeline for the prefectures on the command line.
+
+    Args:
+        argv (list of str, optional): The arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: The exit status.
+    """
+    parser = argparse.ArgumentParser(prog="cnparser", description="Download, parse, enrich and write "
+                                     "the Corporate Number Publication Site data of prefectures.")
+    parser.add_argument("prefectures", nargs="*", default=["All"],
+                        help="Prefecture names in Roman characters, such as Tottori. Defaults to All.")
+    parser.add_argument("--enrich", nargs="*", metavar="PROCESS",
+                        help="Enrich the data with these processes, or with all of them if none is given.")
+    parser.add_argument("--format", choices=FORMATS, default="parquet", help="Output format. Defaults to parquet.")
+    parser.add_argument("--output", default=".", help="Output directory, one file per prefecture. Defaults to '.'.")
+    parser.add_argument("--cache", help="Directory to keep downloaded files in.")
+    parser.add_argument("--offline", action="store_true", help="Load from the cache only.")
+    parser.add_argument("--kana-cache", help="SQLite file to keep kana conversions in.")
+    parser.add_argument("--schema", choices=["object", "compact"], default="object", help="Column types. Defaults to object.")
+    parser.add_argument("--download-workers", type=int, default=4, help="Concurrent downloads. Defaults to 4.")
+    parser.add_argument("--parse-workers", type=int, default=1, help="Concurrent parses. Defaults to 1.")
+    parser.add_argument("--enrich-workers", type=int, default=1, help="Files enriched concurrently. Defaults to 1.")
+    parser.add_argument("--write-workers", type=int, default=1, help="Concurrent writes. Defaults to 1.")
+    parser.add_argument("--executor", choices=EXECUTORS, default="auto", help="Executor of each enrich. Defaults to auto.")
+    parser.add_argument("--queue-size", type=int, default=2, help="Files waiting between two stages. Defaults to 2.")
+    args = parser.parse_args(argv)
+
+    workers = {"download": args.download_workers, "parse": args.parse_workers,
+               "enrich": args.enrich_workers, "write": args.write_workers}
+    kana_cache = KanaCache(args.kana_cache) if args.kana_cache else None
+    try:
+        stats = run_pipeline(args.prefectures, output=args.output, processes=args.enrich, file_format=args.format,
+                             cache=args.cache, offline=args.offline, schema=args.schema, workers=workers,
+                             queue_size=args.queue_size, executor=args.executor, kana_cache=kana_cache)
+    finally:
+        if kana_cache is not None:
+            kana_cache.close()
+    print(report(stats), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+'''aio.py
+'''
+import asyncio
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+from cnparser.executor import concat_chunks
+from cnparser.load import CHUNK_SIZE, ZipLoader, read_csv
+
+async def aload(prefecture="All", cache=None, offline=False, max_workers=4, as_dict=False, schema="object",
+                progress=None, executor=None):
+    """Loads data for a prefecture or a list of prefectures without blocking the event loop.
+
+    The asynchronous counterpart of load. See AsyncZipLoader.
+
+    Args:
+        prefecture (str or list of str): The name of the prefecture, or the names of the prefectures,
+            to load data for. Defaults to "All".
+        cache (ZipCache or str, optional): A cache, or a cache directory, to keep downloaded files in.
+        offline (bool): Load from the cache only, without any network access. Defaults to False.
+        max_workers (int): The number of concurrent downloads for a list of prefectures. Defaults to 4.
+        as_dict (bool): Return a dict of DataFrames keyed by prefecture instead of one
+            concatenated DataFrame for a list of prefectures. Defaults to False.
+        schema (str): The column types, "object" or "compact". Defaults to "object".
+        progress (callable, optional): Called on the event loop with the prefecture, the bytes
+            received so far and the total bytes (or None) after each downloaded chunk.
+        executor (concurrent.futures.Executor, optional): The executor parsing the CSV files.
+            Defaults to the default executor of the event loop.
+
+    Returns:
+        DataFrame or dict: A DataFrame containing the loaded data, or a dict of DataFrames if `as_dict` is set.
+    """
+    loader = AsyncZipLoader(cache=cache, offline=offline, schema=schema, executor=executor)
+    await loader.start()
+    prefectures = [prefecture] if isinstance(prefecture, str) else list(prefecture)
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def load_one(pref):
+        callback = None if progress is None else lambda received, total: progress(pref, received, total)
+        async with semaphore:
+            return await loader.zip_load(loader.file_id(pref), progress=callback)
+
+    frames = await asyncio.gather(*(load_one(pref) for pref in prefectures))
+    if isinstance(prefecture, str):
+        return frames[0]
+    if as_dict:
+        return dict(zip(prefectures, frames))
+    return concat_chunks(list(frames))
+
+class AsyncZipLoader(ZipLoader):
+    """Asynchronous counterpart of ZipLoader for asyncio services.
+
+    The blocking requests calls of the token fetch and the streamed download run on
+    worker threads, so the event loop is never blocked. The zip file is then extracted
+    to a temporary file on a worker thread and parsed on `executor`; a
+    ProcessPoolExecutor keeps parsing off the interpreter of the event loop as well.
+
+    Cancelling a zip_load stops its download or extraction after the current chunk and
+    removes its temporary file. refresh reloads
+    the token and the file IDs while downloads in flight keep the parameters they
+    started with.
+    """
+    def __init__(self, cache=None, offline=False, session=None, schema="object", url=None, executor=None):
+        """
+        Args:
+            cache, offline, session, schema, url: See ZipLoader.
+            executor (concurrent.futures.Executor, optional): The executor parsing the CSV
+                files. Defaults to the default executor of the event loop.
+        """
+        self.executor = executor
+        super().__init__(cache=cache, offline=offline, session=session, schema=schema, url=url)
+
+    async def start(self):
+        """Loads the token and the file IDs from the download page, unless offline."""
+        if not self.offline:
+            await self.refresh()
+
+    async def refresh(self):
+        """Reloads the token and the file IDs. Downloads in flight are not affected."""
+        self.payload = await asyncio.get_running_loop().run_in_executor(None, super()._payload)
+
+    def refresh_in_background(self) -> asyncio.Task:
+        """Starts refresh as a task, which zip_load does not wait for.
+
+        Returns:
+            asyncio.Task: The refresh task.
+        """
+        return asyncio.get_running_loop().create_task(self.refresh())
+
+    async def zip_load(self, file_id, progress=None) -> pd.DataFrame:
+        """Downloads and parses a zip file from the server using a file ID.
+
+        Args:
+            file_id (str): The file ID to request the zip file.
+            progress (callable, optional): Called on the event loop with the bytes received
+                so far and the total bytes (or None) after each chunk.
+
+        Returns:
+            DataFrame: A DataFrame containing the data from the zip file.
+        """
+        if self.payload is None and not self.offline:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        cancellation = _Cancellation()
+
+        def report(received, total):
+            cancellation.check()
+            if progress is not None:
+                loop.call_soon_threadsafe(progress, received, total)
+
+        try:
+            path = await loop.run_in_executor(None, self._download_csv, file_id, report, cancellation)
+        except asyncio.CancelledError:
+            cancellation.cancel()
+            raise
+        try:
+            return await loop.run_in_executor(self.executor, read_csv, path, self.schema)
+        finally:
+            os.remove(path)
+
+    def _payload(self):
+        """Defers the token to start, as it must not be loaded on the event loop."""
+        return None
+
+    def _download_csv(self, file_id, progress, cancellation) -> str:
+        """Downloads a zip file and extracts its CSV member to a temporary file, on a worker thread.
+
+        The extraction is copied in `CHUNK_SIZE` pieces and stops once the load is cancelled.
+
+        Args:
+            file_id (str): The file ID to use for the download.
+            progress (callable): Called with the bytes received and the total bytes after each chunk.
+            cancellation (_Cancellation): The cancellation state of the load.
+
+        Returns:
+            str: The path of the temporary CSV file, which the caller removes.
+
+        Raises:
+            asyncio.CancelledError: If the load is cancelled. The temporary file is removed.
+        """
+        with self._download_zip(file_id, progress) as contents:
+            with self._uncompress_file(contents) as csv_file:
+                handle, path = tempfile.mkstemp(suffix=".csv")
+                try:
+                    with os.fdopen(handle, "wb") as file:
+                        while True:
+                            cancellation.check()
+                            chunk = csv_file.read(CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            file.write(chunk)
+                except BaseException:
+                    os.remove(path)
+                    raise
+        return cancellation.hand_over(path)
+
+class _Cancellation():
+    """The cancellation of a zip_load, shared between the event loop and its worker thread.
+
+    The worker hands the finished temporary file over under a lock, so the file is
+    removed by whichever side sees the cancellation last.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.path = None
+
+    def check(self):
+        """Raises CancelledError in the worker once the load is cancelled."""
+        if self.cancelled:
+            raise asyncio.CancelledError()
+
+    def hand_over(self, path: str) -> str:
+        """Returns the finished file of the worker, or removes it if the load was cancelled."""
+        with self._lock:
+            if not self.cancelled:
+                self.path = path
+                return path
+        os.remove(path)
+        raise asyncio.CancelledError()
+
+    def cancel(self):
+        """Cancels the load, removing a file handed over before the cancellation was seen."""
+        with self._lock:
+            self.cancelled = True
+            path, self.path = self.path, None
+        if path is not None:
+            os.remove(path)
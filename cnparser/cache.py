@@ -0,0 +1,273 @@
+'''cache.py
+'''
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cnparser")
+
+class ZipCache():
+    """Keeps downloaded zip files on local disk, keyed by the file ID in file_id.json.
+
+    Each entry records the size, the ETag/Last-Modified headers of the response and
+    a SHA-256 of the content. When `max_bytes` is set, the least recently used
+    entries are evicted once the cache grows past it.
+    """
+    def __init__(self, directory=None, max_bytes=None, verify=False):
+        """
+        Args:
+            directory (str, optional): The cache directory. Defaults to $CNPARSER_CACHE_DIR or ~/.cache/cnparser.
+            max_bytes (int, optional): The size cap of the cache in bytes. Defaults to no limit.
+            verify (bool): Check the SHA-256 of an entry every time it is opened. Defaults to False.
+        """
+        self.directory = os.path.expanduser(directory or os.environ.get("CNPARSER_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.index_path = os.path.join(self.directory, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, file_id) -> dict:
+        """Returns the metadata of a cached file.
+
+        Args:
+            file_id (str): The file ID of the zip file.
+
+        Returns:
+            dict: The entry with size, etag, last_modified, sha256 and last_access, or None.
+        """
+        with self._lock:
+            entry = self._read_index().get(file_id)
+        if entry and not os.path.exists(self.path(file_id)):
+            return None
+        return entry
+
+    def path(self, file_id) -> str:
+        """Returns the location of the cached zip file for a file ID."""
+        return os.path.join(self.directory, f"{file_id}.zip")
+
+    def open(self, file_id):
+        """Opens a cached zip file and marks it as recently used.
+
+        Args:
+            file_id (str): The file ID of the zip file.
+
+        Returns:
+            file object: The cached zip file opened in binary mode.
+
+        Raises:
+            SystemExit: If the file is not cached or fails the SHA-256 check.
+        """
+        entry = self.get(file_id)
+        if entry is None:
+            raise SystemExit(f"File {file_id} is not in the cache: {self.directory}")
+        if self.verify and _sha256(self.path(file_id)) != entry["sha256"]:
+            raise SystemExit(f"Cached file {file_id} is corrupted: {self.path(file_id)}")
+        with self._lock:
+            index = self._read_index()
+            if file_id in index:
+                index[file_id]["last_access"] = time.time()
+                self._write_index(index)
+        return open(self.path(file_id), "rb")
+
+    def store(self, file_id, chunks, etag=None, last_modified=None):
+        """Writes a downloaded zip file into the cache.
+
+        Args:
+            file_id (str): The file ID of the zip file.
+            chunks (iterable of bytes): The content of the zip file.
+            etag (str, optional): The ETag header of the response.
+            last_modified (str, optional): The Last-Modified header of the response.
+
+        Returns:
+            file object: The cached zip file opened in binary mode.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, self.path(file_id))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            index = self._read_index()
+            index[file_id] = {
+                "size": size,
+                "etag": etag,
+                "last_modified": last_modified,
+                "sha256": digest.hexdigest(),
+                "last_access": time.time(),
+            }
+            self._evict(index, keep=file_id)
+            self._write_index(index)
+        return open(self.path(file_id), "rb")
+
+    def is_fresh(self, file_id, headers) -> bool:
+        """Checks whether response headers describe the same file as the cached one.
+
+        Args:
+            file_id (str): The file ID of the zip file.
+            headers (Mapping): The headers of the HTTP response.
+
+        Returns:
+            bool: True if the ETag or Last-Modified header (and the size, if given) match the entry.
+        """
+        entry = self.get(file_id)
+        if entry is None:
+            return False
+        length = headers.get("Content-Length")
+        if length is not None and int(length) != entry["size"]:
+            return False
+        if headers.get("ETag") and entry["etag"]:
+            return headers.get("ETag") == entry["etag"]
+        if headers.get("Last-Modified") and entry["last_modified"]:
+            return headers.get("Last-Modified") == entry["last_modified"]
+        return False
+
+    def validators(self, file_id) -> dict:
+        """Returns conditional request headers for the cached file, if any."""
+        entry = self.get(file_id) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def clear(self):
+        """Removes every cached file."""
+        with self._lock:
+            for file_id in self._read_index():
+                if os.path.exists(self.path(file_id)):
+                    os.remove(self.path(file_id))
+            self._write_index({})
+
+    def _evict(self, index, keep=None):
+        """Removes the least recently used entries until the cache fits in max_bytes."""
+        if self.max_bytes is None:
+            return
+        total = sum(entry["size"] for entry in index.values())
+        for file_id in sorted(index, key=lambda key: index[key]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if file_id == keep:
+                continue
+            total -= index.pop(file_id)["size"]
+            if os.path.exists(self.path(file_id)):
+                os.remove(self.path(file_id))
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="UTF-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index):
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".json")
+        with os.fdopen(handle, "w", encoding="UTF-8") as file:
+            json.dump(index, file, indent=4)
+        os.replace(tmp_path, self.index_path)
+
+class KanaCache():
+    """Persistent memo of kana conversions stored in SQLite.
+
+    Entries are keyed by the cleaned text and a version string, so conversions made
+    by another pykakasi release are not reused. When `max_entries` is set, the least
+    recently used entries are removed once the memo grows past it.
+    """
+    def __init__(self, path=None, max_entries=None):
+        """
+        Args:
+            path (str, optional): The SQLite file. Defaults to kana.sqlite3 in the default cache directory.
+            max_entries (int, optional): The number of conversions to keep. Defaults to no limit.
+        """
+        self.path = os.path.expanduser(path or os.path.join(
+            os.environ.get("CNPARSER_CACHE_DIR", DEFAULT_CACHE_DIR), "kana.sqlite3"))
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS kana ("
+                "text TEXT NOT NULL, version TEXT NOT NULL, kana TEXT NOT NULL, last_used REAL NOT NULL, "
+                "PRIMARY KEY (text, version))")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS kana_last_used ON kana (last_used)")
+
+    def get_many(self, texts, version) -> dict:
+        """Looks up the conversions of several texts.
+
+        Args:
+            texts (iterable of str): The cleaned texts.
+            version (str): The version of the converter.
+
+        Returns:
+            dict: A mapping of the texts found in the memo to their kana.
+        """
+        texts = list(texts)
+        found = {}
+        with self._lock, self._connection:
+            for start in range(0, len(texts), 500):
+                batch = texts[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT text, kana FROM kana WHERE version = ? AND text IN ({placeholders})",
+                    [version] + batch).fetchall()
+                found.update(rows)
+            self._connection.executemany(
+                "UPDATE kana SET last_used = ? WHERE text = ? AND version = ?",
+                [(time.time(), text, version) for text in found])
+        return found
+
+    def put_many(self, conversions, version):
+        """Stores conversions and evicts the least recently used ones past max_entries.
+
+        Args:
+            conversions (dict): A mapping of cleaned texts to kana.
+            version (str): The version of the converter.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO kana (text, version, kana, last_used) VALUES (?, ?, ?, ?)",
+                [(text, version, kana, now) for text, kana in conversions.items()])
+            if self.max_entries is not None:
+                self._connection.execute(
+                    "DELETE FROM kana WHERE rowid IN (SELECT rowid FROM kana ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM kana").fetchone()[0]
+
+    def __getstate__(self):
+        # Worker processes open their own connection to the same file
+        return {"path": self.path, "max_entries": self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_entries"])
+
+    def close(self):
+        """Closes the SQLite connection."""
+        self._connection.close()
+
+def _sha256(path) -> str:
+    """Computes the SHA-256 of a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,125 +1,589 @@
-import multiprocessing as mp
+import hashlib
+import json
 import re
 import unicodedata
 import warnings
+from functools import lru_cache, partial
+from importlib.metadata import version
 
+import numpy as np
 import pandas as pd
-from pandarallel import pandarallel
-import pykakasi
 
-from cnparser.utility import load_config
+from cnparser.executor import concat_chunks, run_chunked
+from cnparser.stats import Stats, count
+from cnparser.utility import compiled_config
 
-# Initialize libraries
-pandarallel.initialize()
-kks = pykakasi.kakasi()
-legal_entity_regex = re.compile('|'.join(map(re.escape, load_config("legal_entity"))))
-kind = load_config("kind")
+katakana_regex = re.compile(r"[ァ-ヴー]+")
+post_code_regex = re.compile(r"\d{7}")
+latin_regex = re.compile(r"[A-Za-z&]+")
+ampersand_regex = re.compile(r"(&)")
+# Kanji numerals before a block or lot marker, or at the end after one, as in 二丁目三番地四
+KANJI_NUMERALS = "〇一二三四五六七八九十百千"
+kanji_number_regex = re.compile(rf"[{KANJI_NUMERALS}]+(?=丁目|番地|番(?!町)|号)|(?<=[目地番号の-])[{KANJI_NUMERALS}]+$")
+address_marker_regex = re.compile(r"(\d+)(?:丁目|番地|番(?!町)|号)")
+address_dash_regex = re.compile(r"(?<=[\d-])[のー‐‑‒–—―−](?=\d)")
 
-def enrich(df: pd.DataFrame, *processes) -> pd.DataFrame:
+# Columns holding only codes, dates and flags, which never contain full-width text
+CODE_COLUMNS = frozenset([
+    "sequence_number", "corporate_number", "process", "correct", "update_date", "change_date",
+    "name_image_id", "kind", "address_image_id", "prefecture_code", "city_code", "post_code",
+    "address_outside_image_id", "close_date", "close_cause", "successor_corporate_number",
+    "change_cause", "assignment_date", "latest", "hihyoji",
+])
+
+# Version of the _transliterate rules, part of the version key of stored kana conversions
+TRANSLITERATION_VERSION = "words-2"
+
+# Low-cardinality columns written as categoricals, so each distinct value is stored once
+CATEGORY_COLUMNS = frozenset([
+    "legal_entity", "prefecture_name", "city_name", "en_prefecture_name", "en_city_name",
+])
+
+def enrich(df: pd.DataFrame, *processes, kana_cache=None, executor="auto", n_workers=None, stats=None,
+           mp_context=None) -> pd.DataFrame:
     """
     Enriches the DataFrame with additional data processing functions specified by the user.
 
+    The processes are resolved into a Plan (see plan_enrich). Only the columns the
+    plan reads are split into one chunk per worker, each worker runs all the stages on
+    its chunk, and the columns the plan writes are set back on the DataFrame.
+
     Args:
         df (pd.DataFrame): The DataFrame to be processed.
         *processes (str): Variable length argument list of process names to apply.
+            All processes are applied when none is given.
+        kana_cache (KanaCache, optional): The persistent memo used by enrich_kana.
+        executor (str): "serial", "thread", "process", or "auto" to process small
+            DataFrames serially and others on processes. Defaults to "auto".
+        n_workers (int, optional): The number of workers. Defaults to the number of CPUs.
+        stats (Stats, optional): Records the time and rows of each stage on each chunk.
+        mp_context (multiprocessing context, optional): The context starting the worker
+            processes (see run_chunked).
 
     Returns:
         pd.DataFrame: The enriched DataFrame.
     """
-    function_map = {
-        'standardization': standardization,
-        'enrich_kana': enrich_kana,
-        'enrich_kind': enrich_kind,
-        'enrich_post_code': enrich_post_code,
+    plan = plan_enrich(*processes, kana_cache=kana_cache)
+    columns = plan.reads(df)
+    if not plan.stages:
+        return df
+
+    frame = df[columns].copy(deep=False)
+    if stats is None:
+        result = run_chunked(frame, plan, executor, n_workers, mp_context=mp_context)
+    else:
+        measured = partial(plan.measured, trace_memory=stats.trace_memory)
+        result = run_chunked(frame, measured, executor, n_workers, combine=partial(_combine_measured, stats),
+                             mp_context=mp_context)
+    for column in result.columns:
+        df[column] = result[column]
+    return df
+
+def plan_enrich(*processes, kana_cache=None):
+    """
+    Resolves process names into a Plan of enrich stages.
+
+    Stages run in a fixed order. Unless 'standardization' is requested (or no process
+    is given), only the columns the requested stages depend on are standardized.
+
+    Args:
+        *processes (str): Variable length argument list of process names to apply.
+            All processes are planned when none is given.
+        kana_cache (KanaCache, optional): The persistent memo used by enrich_kana.
+
+    Returns:
+        Plan: The stages to apply.
+    """
+    # name: (function, columns read, columns written, columns to standardize first)
+    stage_map = {
+        'standardization': (standardization, None, None, ()),
+        'enrich_kana': (partial(enrich_kana, cache=kana_cache), ('name', 'furigana'), ('furigana',), ('name', 'furigana')),
+        'enrich_kind': (enrich_kind, ('kind',), ('legal_entity',), ()),
+        'enrich_post_code': (enrich_post_code, ('post_code',), ('post_code',), ()),
+        'enrich_address': (enrich_address, ('street_number', 'prefecture_code', 'city_code'), ('address_key', 'city_key'), ()),
     }
 
-    valid_processes = [standardization]
+    requested = set()
     for proc in processes:
-        if proc in function_map:
-            valid_processes.append(proc)
+        if proc in stage_map:
+            requested.add(proc)
         else:
             warnings.warn(f'No valid function name {proc}. Skip {proc} processing.')
+    if not processes:
+        requested = set(stage_map)
 
-    if len(valid_processes) == 1:
-        selected_functions = list(function_map.values())
+    stages = []
+    if 'standardization' in requested:
+        stages.append(Stage('standardization', standardization, None, None))
     else:
-        selected_functions = [function_map[proc] for proc in valid_processes if proc in function_map]
+        columns = tuple(dict.fromkeys(column for name in stage_map if name in requested for column in stage_map[name][3]))
+        if columns:
+            stages.append(Stage('standardization', partial(standardization, columns=columns), columns, columns))
+    for name, (func, reads, writes, _) in stage_map.items():
+        if name in requested and name != 'standardization':
+            stages.append(Stage(name, func, reads, writes))
+    return Plan(stages)
 
-    for func in selected_functions:
-        df = func(df)
+class Stage():
+    """A step of the enrich pipeline with the columns it reads and writes.
 
-    return df
+    Columns of None stand for every text column of the DataFrame (see CODE_COLUMNS).
+    """
+    def __init__(self, name, func, reads, writes):
+        self.name = name
+        self.func = func
+        self.reads = reads
+        self.writes = writes
+
+class Plan():
+    """An ordered list of enrich stages, applied to a DataFrame in one pass.
 
-def standardization(df: pd.DataFrame) -> pd.DataFrame:
+    A Plan is callable on a DataFrame chunk, so the stages run back to back while the
+    chunk is in the worker.
+    """
+    def __init__(self, stages):
+        self.stages = stages
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        for stage in self.stages:
+            df = stage.func(df)
+        return df
+
+    def measured(self, df: pd.DataFrame, trace_memory=False):
+        """Applies the stages like calling the Plan, measuring each stage.
+
+        Args:
+            df (pd.DataFrame): The DataFrame chunk to be processed.
+            trace_memory (bool): Record the peak memory of each stage. Defaults to False.
+
+        Returns:
+            tuple: The processed DataFrame and the list of stage records (see Stats).
+        """
+        stats = Stats(trace_memory=trace_memory)
+        for stage in self.stages:
+            with stats.stage(stage.name, rows=len(df)):
+                df = stage.func(df)
+        return df, stats.records
+
+    def reads(self, df: pd.DataFrame) -> list:
+        """Returns the columns of the DataFrame read or written by any stage, in DataFrame order."""
+        names = set()
+        for stage in self.stages:
+            for columns in (stage.reads, stage.writes):
+                names.update(_text_columns(df) if columns is None else columns)
+        return [column for column in df.columns if column in names]
+
+    def explain(self) -> str:
+        """Describes the columns each stage reads and writes.
+
+        Returns:
+            str: One line per stage.
+        """
+        def describe(columns):
+            return "all text columns" if columns is None else ", ".join(columns)
+        return "\n".join(f"{i}. {stage.name}: reads {describe(stage.reads)} -> writes {describe(stage.writes)}"
+                         for i, stage in enumerate(self.stages, 1))
+
+def _combine_measured(stats, results) -> pd.DataFrame:
+    """Joins the chunks processed by Plan.measured and adds their records to the stats."""
+    for _, records in results:
+        stats.extend(records)
+    frames = [frame for frame, _ in results]
+    return frames[0] if len(frames) == 1 else concat_chunks(frames, ignore_index=False)
+
+def standardization(df: pd.DataFrame, columns=None) -> pd.DataFrame:
     """
     Converts all string columns in the DataFrame to half-width.
 
+    Code and date columns (see CODE_COLUMNS) are skipped, and each distinct value
+    of a column is normalized only once. The columns in CATEGORY_COLUMNS are returned
+    as categoricals.
+
     Args:
         df (pd.DataFrame): The DataFrame to be converted.
+        columns (iterable of str, optional): Only convert these columns. Defaults to all text columns.
 
     Returns:
         pd.DataFrame: The DataFrame with all string columns converted to half-width.
     """
-    for column in df.columns:
-        df[column] = df[column].parallel_apply(lambda x: _convert_to_half_width(x) if isinstance(x, str) else x)
+    for column in _text_columns(df) if columns is None else columns:
+        if column in df.columns and _is_text(df[column]):
+            df[column] = _apply_unique(df[column], _convert_to_half_width, categorical=column in CATEGORY_COLUMNS)
     return df
 
-def enrich_kana(df: pd.DataFrame) -> pd.DataFrame:
+def _text_columns(df: pd.DataFrame) -> list:
+    """Returns the columns of the DataFrame which may contain full-width text."""
+    return [column for column in df.columns if column not in CODE_COLUMNS and _is_text(df[column])]
+
+# pykakasi and the artifacts compiled from the config files are initialized on
+# first use, so that importing cnparser does not pay for them.
+@lru_cache(maxsize=None)
+def _kakasi():
+    """Returns the shared pykakasi converter."""
+    import pykakasi
+    return pykakasi.kakasi()
+
+def _legal_entity_regex():
+    """Returns the regex matching the legal entity names in legal_entity.json."""
+    return compiled_config(_compile_legal_entity_regex, ("legal_entity",))
+
+def _compile_legal_entity_regex(names):
+    """Builds the regex of _legal_entity_regex."""
+    return re.compile('|'.join(map(re.escape, names)))
+
+def _kind_lookup():
+    """Returns the index of the kind codes in kind.json and the array of their labels.
+
+    The labels array has a trailing None, so positions of -1 from the index are missing.
+    """
+    return compiled_config(_compile_kind_lookup, ("kind",))
+
+def _compile_kind_lookup(kinds):
+    """Builds the kind lookup arrays of _kind_lookup."""
+    return pd.Index(list(kinds)), np.array(list(kinds.values()) + [None], dtype=object)
+
+def _eng_kana():
+    """Returns the trie of the upper-case English words in eng_kana.json and its digest.
+
+    Each node maps a character to the next node, and the node ending a word holds
+    its kana under the key None.
+    """
+    return compiled_config(_compile_eng_kana, ("eng_kana",))
+
+def _compile_eng_kana(dictionary):
+    """Builds the trie and digest of _eng_kana."""
+    _transliterate_segment.cache_clear()
+    root = {}
+    for word, kana in dictionary.items():
+        node = root
+        for char in word.upper():
+            node = node.setdefault(char, {})
+        node[None] = kana
+    digest = hashlib.sha1(json.dumps(dictionary, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+    return root, digest
+
+@lru_cache(maxsize=None)
+def _pykakasi_version() -> str:
+    """Returns the installed version of pykakasi."""
+    return version('pykakasi')
+
+def _kana_version() -> str:
+    """Returns the version key of kana conversions stored in a KanaCache."""
+    return f"pykakasi-{_pykakasi_version()}-eng_kana-{_eng_kana()[1]}-{TRANSLITERATION_VERSION}"
+
+def _is_text(series: pd.Series) -> bool:
+    """Returns True if the Series may hold strings."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _is_text(series.cat.categories.to_series())
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+def _apply_unique(series: pd.Series, func, batch=False, categorical=False) -> pd.Series:
+    """
+    Applies a function to each distinct non-null value of a Series and maps the results back.
+
+    Args:
+        series (pd.Series): The Series to be converted.
+        func (callable): The function to apply to each distinct string value.
+        batch (bool): Call `func` once with the list of distinct values instead of once per value.
+        categorical (bool): Return a categorical Series with sorted categories, whatever
+            the dtype of `series`. Defaults to False.
+
+    Returns:
+        pd.Series: The converted Series. Missing values are kept as they are, and
+        categorical and string columns keep their dtype.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = list(series.cat.categories)
+        converted = func(categories) if batch else [func(value) if isinstance(value, str) else value for value in categories]
+        if categorical:
+            return _to_categorical(series.cat.codes.to_numpy(), converted, series)
+        return series.map(dict(zip(categories, converted)))
+
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return series
+    converted = np.empty(len(uniques) + 1, dtype=object)
+    if batch:
+        converted[:-1] = func(list(uniques))
+    else:
+        converted[:-1] = [func(value) if isinstance(value, str) else value for value in uniques]
+    converted[-1] = None
+    if categorical:
+        return _to_categorical(codes, converted[:-1], series)
+    values = converted[codes]
+    missing = codes == -1
+    if missing.any():
+        values[missing] = series.to_numpy(dtype=object)[missing]
+    result = pd.Series(values, index=series.index, name=series.name)
+    if isinstance(series.dtype, pd.StringDtype):
+        return result.astype(series.dtype)
+    return result
+
+def _to_categorical(codes, values, series: pd.Series) -> pd.Series:
+    """
+    Builds a categorical Series from the codes of a Series into its converted distinct values.
+
+    Values converted to the same string share one category, and codes of -1 or values
+    converted to None are missing.
+
+    Args:
+        codes (np.ndarray): The position of each row in `values`, or -1 for missing values.
+        values (list): The converted distinct values.
+        series (pd.Series): The original Series, whose index and name are kept.
+
+    Returns:
+        pd.Series: The categorical Series.
+    """
+    value_codes, categories = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    value_codes = np.append(value_codes, -1)
+    return pd.Series(pd.Categorical.from_codes(value_codes[codes], categories), index=series.index, name=series.name)
+
+def enrich_kana(df: pd.DataFrame, cache=None) -> pd.DataFrame:
     """
     Adds a standardized furigana column to the DataFrame.
 
+    English words are read with the eng_kana.json dictionary and the rest with pykakasi.
+    Each distinct name is converted once. With a KanaCache, conversions are also
+    looked up in and stored to the persistent memo, so names converted by an
+    earlier run are not converted again.
+
     Args:
         df (pd.DataFrame): The DataFrame to be enriched.
+        cache (KanaCache, optional): The persistent memo of kana conversions.
 
     Returns:
         pd.DataFrame: The DataFrame with the 'std_furigana' column added.
     """
     df['furigana'] = df['furigana'].where(df['furigana'].notna(), df['name'])
-    df['furigana'] = df['furigana'].parallel_apply(_normalize_and_convert_kana)
+    df['furigana'] = _apply_unique(df['furigana'], lambda texts: _convert_kana_batch(texts, cache), batch=True)
     return df
 
-def _normalize_and_convert_kana(text: str) -> str:
+def _convert_kana_batch(texts, cache=None) -> list:
+    """
+    Normalizes and converts a batch of distinct texts to kana.
+
+    Texts which are the same after the legal entity names are removed share one conversion.
+
+    Args:
+        texts (list of str): The texts to be converted.
+        cache (KanaCache, optional): The persistent memo of kana conversions.
+
+    Returns:
+        list of str: The converted texts in kana, in the order of `texts`.
+    """
+    results = list(texts)
+    pending = {}
+    legal_entity = _legal_entity_regex()
+    for i, text in enumerate(texts):
+        if not katakana_regex.fullmatch(text):
+            pending.setdefault(legal_entity.sub('', text), []).append(i)
+
+    memo = cache.get_many(pending, _kana_version()) if cache is not None else {}
+    converted = {text: _convert_to_kana(text) for text in pending if text not in memo}
+    if cache is not None:
+        count("cache_hits", len(memo))
+        count("cache_misses", len(converted))
+        if converted:
+            cache.put_many(converted, _kana_version())
+    memo.update(converted)
+
+    for text, positions in pending.items():
+        for i in positions:
+            results[i] = memo[text]
+    return results
+
+def _normalize_and_convert_kana(text: str, legal_entity=None) -> str:
     """
     Normalizes and converts Japanese text to kana.
 
     Args:
         text (str): The text to be normalized and converted.
+        legal_entity (re.Pattern, optional): The regex of _legal_entity_regex, for callers
+            which look it up once for many texts. Defaults to looking it up.
 
     Returns:
         str: The converted text in kana.
     """
-    if re.fullmatch(r"[ァ-ヴー]+", text):
+    if katakana_regex.fullmatch(text):
         return text
     else:
-        cleaned_text = legal_entity_regex.sub('', text)
-        return "".join(item['kana'] for item in kks.convert(cleaned_text))
+        return _convert_to_kana((legal_entity or _legal_entity_regex()).sub('', text))
+
+def _convert_to_kana(text: str) -> str:
+    """
+    Converts Japanese text to kana with pykakasi.
+
+    Args:
+        text (str): The text to be converted.
+
+    Returns:
+        str: The converted text in kana.
+    """
+    return "".join(item['kana'] for item in _kakasi().convert(_transliterate(text)))
+
+def _transliterate(text: str) -> str:
+    """
+    Replaces the English words in the Latin segments of a text with kana from eng_kana.json.
+
+    Only words made up entirely of dictionary words are replaced (see _transliterate_segment).
+
+    Args:
+        text (str): The half-width text.
+
+    Returns:
+        str: The text with the known words in kana. Other letters are kept as they are.
+    """
+    return latin_regex.sub(lambda match: _transliterate_segment(match.group()), text)
+
+@lru_cache(maxsize=65536)
+def _transliterate_segment(segment: str) -> str:
+    """
+    Replaces the words of a Latin segment, split at '&', which are made up entirely of
+    dictionary words. Other words are kept as they are, so a dictionary word inside an
+    unknown word, such as SAP in SAPPORO, is not replaced.
+
+    Args:
+        segment (str): A run of Latin letters and '&'.
+
+    Returns:
+        str: The segment with the known words in kana.
+    """
+    return "".join(_transliterate_word(word) for word in ampersand_regex.split(segment) if word)
+
+def _transliterate_word(word: str) -> str:
+    """
+    Splits a word into dictionary words through the eng_kana trie, preferring the longest
+    first word, as in SYSTEMSUPPORT read as SYSTEM and SUPPORT.
+
+    Args:
+        word (str): Latin letters, or '&'.
+
+    Returns:
+        str: The word in kana, or the word as it is if it cannot be split entirely.
+    """
+    trie = _eng_kana()[0]
+    upper = word.upper()
+    # kana[i] is the reading of upper[i:] when it splits entirely into dictionary words
+    kana = [None] * len(upper) + [""]
+    for start in range(len(upper) - 1, -1, -1):
+        node, end = trie, start
+        while end < len(upper) and upper[end] in node:
+            node = node[upper[end]]
+            end += 1
+            if None in node and kana[end] is not None:
+                kana[start] = node[None] + kana[end]
+    return word if kana[0] is None else kana[0]
 
 def enrich_kind(df: pd.DataFrame) -> pd.DataFrame:
     """
     Maps the 'kind' column of the DataFrame to a standardized legal entity description.
 
+    Each distinct kind code is looked up once and 'legal_entity' is a categorical
+    column, so its few labels are stored once rather than once per row.
+
     Args:
         df (pd.DataFrame): The DataFrame to be enriched.
 
     Returns:
         pd.DataFrame: The DataFrame with the 'std_legal_entity' column added, containing standardized legal entity descriptions.
     """
-    df['legal_entity'] = df['kind'].map(kind)
+    codes, labels = _kind_lookup()
+    df['legal_entity'] = _apply_unique(df['kind'], lambda kinds: labels[codes.get_indexer(list(map(str, kinds)))],
+                                      batch=True, categorical=True)
     return df
 
-def enrich_post_code(df: pd.DataFrame) -> pd.DataFrame:
+def enrich_post_code(df: pd.DataFrame, validate=False) -> pd.DataFrame:
     """
     Adds a standardized postal code column to the DataFrame.
 
+    String columns are formatted with vectorized string slicing, and other columns
+    format each distinct code once. With `validate`, a 'post_code_valid' column flags
+    the codes which are not exactly 7 digits.
+
     Args:
         df (pd.DataFrame): The DataFrame to be enriched.
+        validate (bool): Add the 'post_code_valid' column. Defaults to False.
 
     Returns:
         pd.DataFrame: The DataFrame with the 'std_post_code' column added, where postal codes are formatted as 'XXX-XXX'.
     """
-    df['post_code'] = df['post_code'].parallel_apply(lambda x: f"{str(x)[:3]}-{str(x)[3:]}" if pd.notna(x) else None)
+    codes = df['post_code']
+    if isinstance(codes.dtype, pd.StringDtype):
+        if validate:
+            df['post_code_valid'] = codes.str.fullmatch(post_code_regex.pattern).astype('boolean')
+        df['post_code'] = codes.str[:3] + '-' + codes.str[3:]
+        return df
+
+    if validate:
+        keys, uniques = pd.factorize(codes)
+        flags = np.array([post_code_regex.fullmatch(str(value)) is not None for value in uniques] + [False])
+        df['post_code_valid'] = pd.arrays.BooleanArray(flags[keys], keys == -1)
+    formatted = _apply_unique(codes, lambda values: [f"{str(value)[:3]}-{str(value)[3:]}" for value in values], batch=True)
+    df['post_code'] = formatted.where(codes.notna(), None)
     return df
 
+def enrich_address(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds a normalized address key and a city partition key to the DataFrame.
+
+    'address_key' is the half-width 'street_number' with kanji numerals written in
+    digits and the 丁目, 番地, 番 and 号 forms and dashes written as hyphens, so that
+    東町二丁目２２３番地 and 東町2丁目223 both become 東町2-223. Each distinct street is
+    normalized once. 'city_key' is the integer prefecture_code * 1000 + city_code (the
+    JIS code of the municipality), so addresses can be partitioned by city and compared
+    on (city_key, address_key).
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be enriched.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the 'address_key' and 'city_key' columns added.
+    """
+    df['address_key'] = _apply_unique(df['street_number'], _normalize_street)
+    df['city_key'] = _to_code(df['prefecture_code']) * 1000 + _to_code(df['city_code'])
+    return df
+
+def _normalize_street(text: str) -> str:
+    """
+    Normalizes the numbers and block and lot markers of a street address.
+
+    Args:
+        text (str): The street address.
+
+    Returns:
+        str: The normalized street address.
+    """
+    text = re.sub(r"\s+", "", _convert_to_half_width(text))
+    text = kanji_number_regex.sub(lambda match: str(_kanji_to_int(match.group())), text)
+    text = address_marker_regex.sub(r"\1-", text)
+    text = address_dash_regex.sub("-", text)
+    return re.sub(r"-{2,}", "-", text).rstrip("-")
+
+def _kanji_to_int(numerals: str) -> int:
+    """
+    Converts kanji numerals, positional (二二三) or with units (二百二十三), to an integer.
+
+    Args:
+        numerals (str): The kanji numerals.
+
+    Returns:
+        int: The number.
+    """
+    units = {"十": 10, "百": 100, "千": 1000}
+    total, current = 0, 0
+    for char in numerals:
+        if char in units:
+            total += (current or 1) * units[char]
+            current = 0
+        else:
+            current = current * 10 + KANJI_NUMERALS.index(char)
+    return total + current
+
+def _to_code(series: pd.Series) -> pd.Series:
+    """Converts a column of numeric codes to nullable integers, with missing values for others."""
+    values = pd.Series(series.to_numpy(dtype=object), index=series.index)
+    return pd.to_numeric(values, errors="coerce").astype("Int32")
+
 def _convert_to_half_width(text: str) -> str:
     """
     Converts full-width alphanumeric characters and symbols to half-width.
@@ -130,5 +594,7 @@ def _convert_to_half_width(text: str) -> str:
     Returns:
         str: The converted text in half-width.
     """
+    if unicodedata.is_normalized('NFKC', text):
+        return text
     half_width_text = unicodedata.normalize('NFKC', text)
     return half_width_text
\ No newline at end of file
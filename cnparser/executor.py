@@ -0,0 +1,99 @@
+'''executor.py
+'''
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+EXECUTORS = ("auto", "serial", "thread", "process")
+
+# Frames smaller than this are processed serially by the "auto" executor
+SERIAL_THRESHOLD = 100000
+
+def run_chunked(df: pd.DataFrame, func, executor="auto", n_workers=None, combine=None, mp_context=None):
+    """
+    Runs a function over row chunks of a DataFrame on the selected backend.
+
+    The DataFrame is split into one chunk per worker and each chunk is passed to
+    `func` once, so data crosses a process boundary once per chunk in each direction.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be processed.
+        func (callable): The function taking and returning a DataFrame. It must be
+            picklable for the "process" executor.
+        executor (str): "serial", "thread", "process", or "auto" to run small frames
+            serially and others on processes. Defaults to "auto".
+        n_workers (int, optional): The number of workers. Defaults to the number of CPUs.
+        combine (callable, optional): The function joining the list of chunk results, for
+            functions returning more than a DataFrame. Defaults to concat_chunks keeping
+            the index.
+        mp_context (multiprocessing context, optional): The context starting the worker
+            processes, such as a "spawn" or "forkserver" context for callers running other
+            threads. Defaults to the platform default.
+
+    Returns:
+        pd.DataFrame: The processed chunks concatenated in their original order, or the
+        result of `combine`.
+
+    Raises:
+        ValueError: If the executor is unknown.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unexpected executor: {executor}. Choose from {', '.join(EXECUTORS)}")
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(df)))
+    if executor == "auto":
+        executor = "serial" if len(df) < SERIAL_THRESHOLD or n_workers == 1 else "process"
+    if executor == "serial" or n_workers == 1:
+        return func(df) if combine is None else combine([func(df)])
+
+    bounds = np.linspace(0, len(df), n_workers + 1, dtype=int)
+    chunks = [df.iloc[start:end].copy() for start, end in zip(bounds[:-1], bounds[1:])]
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=n_workers)
+    else:
+        pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context)
+    with pool as workers:
+        results = list(workers.map(func, chunks))
+    return (combine or partial(concat_chunks, ignore_index=False))(results)
+
+def process_context():
+    """
+    Returns the multiprocessing context for worker pools started while other threads run.
+
+    Forking a process while other threads hold locks can deadlock the child, so workers
+    are started by a forkserver where available and spawned otherwise.
+
+    Returns:
+        multiprocessing context: The "forkserver" or "spawn" context.
+    """
+    return multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+def concat_chunks(frames, ignore_index=True) -> pd.DataFrame:
+    """
+    Concatenates DataFrames parsed or processed in chunks, keeping categorical columns.
+
+    Chunks of a categorical column usually have different categories, which pd.concat
+    would turn into an object column, so the columns which are categorical in every chunk
+    are first set to the union of the categories.
+
+    Args:
+        frames (list of pd.DataFrame): The chunks, in order. They are modified in place.
+        ignore_index (bool): Give the result a new RangeIndex instead of the index of the
+            chunks. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The concatenated DataFrame.
+    """
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True) if ignore_index else frames[0]
+    for column in frames[0].columns:
+        if all(column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = frames[0][column].cat.categories
+            for frame in frames[1:]:
+                categories = categories.union(frame[column].cat.categories)
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=ignore_index)
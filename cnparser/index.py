@@ -0,0 +1,173 @@
+'''index.py
+'''
+import numpy as np
+import pandas as pd
+
+from cnparser.utility import string_dtype
+
+# Weights of the 12 base digits counted from the right, used by the check digit
+_POWERS = 10 ** np.arange(12, dtype=np.int64)
+_WEIGHTS = np.where(np.arange(1, 13) % 2 == 1, 1, 2)
+
+class CorporateIndex():
+    """Index of the corporate numbers of a DataFrame for lookups by number.
+
+    The corporate numbers are stored as a sorted int64 array with the row position of
+    each number, so batch lookups are a binary search over the whole query array.
+    """
+    def __init__(self, df: pd.DataFrame, keys=None, positions=None, successors=None):
+        """
+        Args:
+            df (pd.DataFrame): The DataFrame with the 'corporate_number' and
+                'successor_corporate_number' columns.
+            keys, positions, successors (np.ndarray, optional): The arrays of a saved index.
+                Built from `df` when omitted.
+
+        Raises:
+            ValueError: If the arrays of a saved index do not match the rows of `df`.
+        """
+        self.frame = df.reset_index(drop=True)
+        numbers = _to_keys(self.frame['corporate_number'])
+        if keys is None:
+            positions = np.argsort(numbers, kind='stable')
+            keys = numbers[positions]
+            successors = _to_keys(self.frame['successor_corporate_number'])
+        elif (len(keys) != len(numbers) or len(positions) != len(numbers) or len(successors) != len(numbers)
+              or not np.array_equal(numbers[positions], keys)):
+            raise ValueError("The saved index does not match the DataFrame: it was built from other rows "
+                             "or another row order")
+        self.keys = keys
+        self.positions = positions
+        self.successors = successors
+
+    def __len__(self):
+        return len(self.keys)
+
+    def locate(self, numbers) -> np.ndarray:
+        """Returns the row positions of corporate numbers.
+
+        Args:
+            numbers (iterable of str): The corporate numbers to look up.
+
+        Returns:
+            np.ndarray: The row position of each number, or -1 if it is not in the index.
+        """
+        return self._locate(_to_keys(numbers))
+
+    def get(self, number: str):
+        """Looks up a corporate number.
+
+        Args:
+            number (str): The 13-digit corporate number.
+
+        Returns:
+            pd.Series: The row of the corporate number, or None if it is not in the index.
+        """
+        position = self.locate([number])[0]
+        return None if position < 0 else self.frame.iloc[position]
+
+    def get_many(self, numbers) -> pd.DataFrame:
+        """Looks up several corporate numbers at once.
+
+        Args:
+            numbers (iterable of str): The corporate numbers to look up.
+
+        Returns:
+            pd.DataFrame: One row per queried number, indexed by the numbers in query order.
+            Numbers which are not in the index have a row of missing values.
+        """
+        numbers = pd.Series(numbers, dtype=object)
+        result = self.frame.reindex(self.locate(numbers))
+        result.index = pd.Index(numbers, name='query')
+        return result
+
+    def validate(self, numbers) -> np.ndarray:
+        """Checks the check digit of corporate numbers. See validate_corporate_number."""
+        return validate_corporate_number(numbers)
+
+    def resolve_successors(self, numbers, max_depth=16) -> np.ndarray:
+        """Follows the successor corporate numbers of several corporate numbers.
+
+        Args:
+            numbers (iterable of str): The corporate numbers to resolve.
+            max_depth (int): The maximum length of a successor chain. Defaults to 16.
+
+        Returns:
+            np.ndarray: The last corporate number of the chain of each number, which is the
+            number itself if it has no successor or is not in the index.
+        """
+        numbers = pd.Series(numbers, dtype=object).to_numpy()
+        current = _to_keys(numbers)
+        for _ in range(max_depth):
+            positions = self._locate(current)
+            successors = np.where(positions >= 0, self.successors[positions.clip(0)], -1)
+            moved = (successors >= 0) & (successors != current)
+            if not moved.any():
+                break
+            current = np.where(moved, successors, current)
+        return np.where(current >= 0, _to_numbers(current), numbers)
+
+    def save(self, path: str):
+        """Saves the index arrays to an .npz file next to the data.
+
+        Args:
+            path (str): The destination file.
+        """
+        np.savez(path, keys=self.keys, positions=self.positions, successors=self.successors)
+
+    @classmethod
+    def load(cls, path: str, df: pd.DataFrame):
+        """Loads an index saved by save.
+
+        Args:
+            path (str): The .npz file.
+            df (pd.DataFrame): The DataFrame the index was built from, in the same row order.
+
+        Returns:
+            CorporateIndex: The index.
+
+        Raises:
+            ValueError: If `df` does not have the rows the index was built from, in the same order.
+        """
+        with np.load(path) as arrays:
+            return cls(df, arrays['keys'], arrays['positions'], arrays['successors'])
+
+    def _locate(self, keys) -> np.ndarray:
+        """Returns the row positions of int64 keys, or -1 if a key is not in the index."""
+        if len(self.keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        index = np.searchsorted(self.keys, keys).clip(0, len(self.keys) - 1)
+        found = (self.keys[index] == keys) & (keys >= 0)
+        return np.where(found, self.positions[index], -1)
+
+def validate_corporate_number(numbers) -> np.ndarray:
+    """Checks the check digit of corporate numbers.
+
+    The first digit of a corporate number is 9 minus the remainder by 9 of the sum of
+    the other 12 digits weighted 1 and 2 alternately from the right.
+
+    Args:
+        numbers (iterable of str): The corporate numbers to check.
+
+    Returns:
+        np.ndarray: True for each 13-digit number with a valid check digit.
+    """
+    keys = _to_keys(numbers)
+    base = keys % 10 ** 12
+    digits = (base[:, None] // _POWERS) % 10
+    expected = 9 - (digits @ _WEIGHTS) % 9
+    return (keys >= 0) & (keys // 10 ** 12 == expected)
+
+def _to_keys(numbers) -> np.ndarray:
+    """Converts corporate numbers to int64 keys, with -1 for missing or malformed numbers."""
+    numbers = pd.Series(numbers, dtype=string_dtype())
+    valid = numbers.str.fullmatch(r'\d{13}').fillna(False).to_numpy(dtype=bool)
+    keys = np.full(len(numbers), -1, dtype=np.int64)
+    keys[valid] = numbers[valid].astype('int64').to_numpy()
+    return keys
+
+def _to_numbers(keys) -> np.ndarray:
+    """Converts int64 keys back to 13-digit corporate numbers."""
+    if len(keys) == 0:
+        return np.empty(0, dtype=object)
+    return np.char.zfill(keys.astype(str), 13).astype(object)
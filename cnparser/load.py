@@ -1,45 +1,142 @@
 '''load.py
 '''
 import io
+import json
+import mmap
+import os
 import re
+import shutil
+import tempfile
+import threading
+import time
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import requests
 import pandas as pd
-from io import StringIO
 from bs4 import BeautifulSoup
 
-from cnparser.utility import load_config
+from cnparser.cache import ZipCache
+from cnparser.executor import concat_chunks, process_context
+from cnparser.stats import count, measure
+from cnparser.utility import compiled_config, load_config, string_dtype
 
-def load(prefecture="All") -> pd.DataFrame:
-    """Loads data for a specified prefecture.
+def load(prefecture="All", cache=None, offline=False, max_workers=4, as_dict=False, schema="object", stats=None,
+         parse_workers=None):
+    """Loads data for a specified prefecture or a list of prefectures.
+
+    A list of prefectures is downloaded concurrently over one session and token,
+    and each file is parsed as soon as its download completes.
 
     Args:
-        prefecture (str): The name of the prefecture to load data for. Defaults to "All".
+        prefecture (str or list of str): The name of the prefecture, or the names of the prefectures,
+            to load data for. Defaults to "All".
+        cache (ZipCache or str, optional): A cache, or a cache directory, to keep downloaded files in.
+        offline (bool): Load from the cache only, without any network access. Defaults to False.
+        max_workers (int): The number of concurrent downloads for a list of prefectures. Defaults to 4.
+        as_dict (bool): Return a dict of DataFrames keyed by prefecture instead of one
+            concatenated DataFrame for a list of prefectures. Defaults to False.
+        schema (str): The column types, "object" for all strings or "compact" for the typed
+            schema in schema.json. Defaults to "object".
+        stats (Stats, optional): Records the time, bytes and rows of each loading stage.
+        parse_workers (int, optional): Parse each file in this many processes (see read_csv).
+            Defaults to one process.
 
     Returns:
-        DataFrame: A DataFrame containing the loaded data.
+        DataFrame or dict: A DataFrame containing the loaded data, or a dict of DataFrames if `as_dict` is set.
     """
-    loader = ZipLoader()
-    return loader.zip_load(_prefecture_2_file_id(prefecture))
+    loader = ZipLoader(cache=cache, offline=offline, schema=schema, stats=stats, parse_workers=parse_workers)
+    if isinstance(prefecture, str):
+        return loader.zip_load(loader.file_id(prefecture))
 
-def read_csv(file_path: str) -> pd.DataFrame:
+    file_ids = {pref: loader.file_id(pref) for pref in prefecture}
+    frames = loader.zip_load_many(file_ids, max_workers=max_workers)
+    if as_dict:
+        return frames
+    return concat_chunks(list(frames.values()))
+
+def read_csv(file_path: str, schema="object", n_workers=None) -> pd.DataFrame:
     """Reads a CSV file from a specified path.
 
+    With `n_workers`, the file is split at line boundaries into that many byte ranges,
+    which are parsed in a process pool. The "compact" schema parses fastest in parallel,
+    as its Arrow-backed columns are passed back from the workers as buffers rather
+    than as Python strings.
+
     Args:
         file_path (str): The path to the CSV file.
+        schema (str): The column types, "object" or "compact". Defaults to "object".
+        n_workers (int, optional): The number of parsing processes. Defaults to one process.
 
     Returns:
         DataFrame: A DataFrame containing the CSV data.
     """
-    header = load_config("header")
-    return pd.read_csv(file_path, encoding='utf-8', header=None, names=header, dtype='object')
+    if n_workers and n_workers > 1:
+        return _parallel_read_csv(file_path, n_workers, schema)
+    return pd.read_csv(file_path, encoding='utf-8', header=None, **_read_options(schema))
+
+def load_diff(date=None, file_id=None, cache=None, offline=False, schema="object", stats=None) -> pd.DataFrame:
+    """Loads a daily difference (sabun) file.
+
+    Args:
+        date (str, optional): The date of the file as YYYY-MM-DD. Defaults to the latest published file.
+        file_id (str, optional): The file ID of the file, instead of `date`. Required in offline mode.
+        cache (ZipCache or str, optional): A cache, or a cache directory, to keep downloaded files in.
+        offline (bool): Load from the cache only, without any network access. Defaults to False.
+        schema (str): The column types, "object" or "compact". Defaults to "object".
+        stats (Stats, optional): Records the time, bytes and rows of each loading stage.
+
+    Returns:
+        DataFrame: A DataFrame containing the changed records.
+
+    Raises:
+        SystemExit: If no file is published for the date.
+    """
+    loader = DiffLoader(cache=cache, offline=offline, schema=schema, stats=stats)
+    if file_id is None:
+        if offline:
+            raise SystemExit("Offline mode requires a file_id")
+        file_id = loader.file_id(date)
+    return loader.zip_load(file_id)
+
+def iter_load(prefecture="All", chunksize=100000, cache=None, offline=False, schema="object", stats=None):
+    """Loads data for a specified prefecture in batches.
+
+    Args:
+        prefecture (str): The name of the prefecture to load data for. Defaults to "All".
+        chunksize (int): The number of rows per batch. Defaults to 100000.
+        cache (ZipCache or str, optional): A cache, or a cache directory, to keep downloaded files in.
+        offline (bool): Load from the cache only, without any network access. Defaults to False.
+        schema (str): The column types, "object" or "compact". Defaults to "object".
+        stats (Stats, optional): Records the time, bytes and rows of each loading stage.
+
+    Yields:
+        DataFrame: DataFrames of at most `chunksize` rows.
+    """
+    loader = ZipLoader(cache=cache, offline=offline, schema=schema, stats=stats)
+    yield from loader.iter_zip_load(loader.file_id(prefecture), chunksize)
+
+def iter_read_csv(file_path: str, chunksize=100000, schema="object"):
+    """Reads a CSV file from a specified path in batches.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        chunksize (int): The number of rows per batch. Defaults to 100000.
+        schema (str): The column types, "object" or "compact". Defaults to "object".
+
+    Yields:
+        DataFrame: DataFrames of at most `chunksize` rows.
+    """
+    with pd.read_csv(file_path, encoding='utf-8', header=None, chunksize=chunksize, **_read_options(schema)) as reader:
+        yield from reader
 
-def _prefecture_2_file_id(prefecture) -> str:
+def _prefecture_2_file_id(prefecture, file_ids=None) -> str:
     """Converts prefecture name to a file ID using configuration.
 
     Args:
         prefecture (str): The prefecture name.
+        file_ids (dict, optional): The file IDs read from the download page, which take
+            precedence over the configuration.
 
     Returns:
         str: The file ID associated with the prefecture.
@@ -47,31 +144,268 @@ def _prefecture_2_file_id(prefecture) -> str:
     Raises:
         SystemExit: If the prefecture is not found in the configuration.
     """
+    key = prefecture.capitalize()
+    if file_ids and key in file_ids:
+        return file_ids[key]
     file_list = load_config("file_id")
     try:
-        return file_list[prefecture.capitalize()]
+        return file_list[key]
     except KeyError as exp:
         raise SystemExit(f"Unexpected Key Value: {prefecture}") from exp
 
+# Bytes of a CSV file read at a time while counting quotes to find line boundaries
+SPLIT_BLOCK_SIZE = 16 * 1024 * 1024
+
+def _parallel_read_csv(file_path, n_workers, schema) -> pd.DataFrame:
+    """Parses the byte ranges of a CSV file in a process pool and concatenates the frames.
+
+    The workers are not forked (see process_context), as the pool may be started from the
+    threads of zip_load_many or of a pipeline.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        n_workers (int): The number of processes and ranges.
+        schema (str): The column types, "object" or "compact".
+
+    Returns:
+        DataFrame: A DataFrame containing the CSV data, in file order.
+    """
+    ranges = _split_ranges(file_path, n_workers)
+    if len(ranges) <= 1:
+        return pd.read_csv(file_path, encoding='utf-8', header=None, **_read_options(schema))
+    starts, ends = zip(*ranges)
+    with ProcessPoolExecutor(max_workers=len(ranges), mp_context=process_context()) as pool:
+        frames = list(pool.map(_read_range, [file_path] * len(ranges), starts, ends, [schema] * len(ranges)))
+    return concat_chunks(frames)
+
+def _split_ranges(file_path, count) -> list:
+    """Splits a CSV file into byte ranges of about the same size which end at line boundaries.
+
+    A newline only ends a record outside quotes, so the quotes before each candidate
+    newline are counted and a newline after an odd number of quotes is skipped. Escaped
+    quotes ("") come in pairs and do not change the parity.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        count (int): The number of ranges to aim for.
+
+    Returns:
+        list of tuple: The (start, end) offsets of the non-empty ranges.
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+    bounds = [0]
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position, odd = 0, False
+        for target in (size * i // count for i in range(1, count)):
+            if target <= bounds[-1]:
+                continue
+            newline = data.find(b"\n", target)
+            while newline != -1:
+                odd ^= _count_quotes(data, position, newline + 1) % 2 == 1
+                position = newline + 1
+                if not odd:
+                    break
+                newline = data.find(b"\n", position)
+            if newline == -1 or position >= size:
+                break
+            bounds.append(position)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def _count_quotes(data, start, end) -> int:
+    """Counts the double quotes in a range of a memory map, a block at a time."""
+    return sum(data[block:min(block + SPLIT_BLOCK_SIZE, end)].count(b'"')
+               for block in range(start, end, SPLIT_BLOCK_SIZE))
+
+def _read_range(file_path, start, end, schema) -> pd.DataFrame:
+    """Parses a byte range of a CSV file, in a worker process of _parallel_read_csv."""
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return pd.read_csv(io.BytesIO(data), encoding='utf-8', header=None, **_read_options(schema))
+
+# Seconds for which the file IDs read from the download page are reused by loaders
+# which could not read them, before falling back to file_id.json
+FILE_ID_TTL = 24 * 60 * 60
+FILE_ID_CACHE = "file_id.json"
+
+_discovered_file_ids = {}
+_discovered_lock = threading.Lock()
+
+def _remember_file_ids(file_ids, cache=None):
+    """Keeps the file IDs read from the download page in memory and in the cache directory."""
+    entry = {"fetched": time.time(), "file_ids": dict(file_ids)}
+    with _discovered_lock:
+        _discovered_file_ids.update(entry)
+        if cache is None:
+            return
+        path = os.path.join(cache.directory, FILE_ID_CACHE)
+        handle, tmp_path = tempfile.mkstemp(dir=cache.directory, suffix=".json")
+        with os.fdopen(handle, "w", encoding="UTF-8") as file:
+            json.dump(entry, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+def _known_file_ids(cache=None, max_age=FILE_ID_TTL) -> dict:
+    """Returns the file IDs read from the download page by an earlier loader.
+
+    Args:
+        cache (ZipCache, optional): The cache whose directory may hold the file IDs.
+        max_age (float, optional): The maximum age in seconds. None accepts any age.
+
+    Returns:
+        dict: The file IDs by prefecture, or an empty dict if none is recent enough.
+    """
+    entries = [dict(_discovered_file_ids)]
+    if cache is not None:
+        try:
+            with open(os.path.join(cache.directory, FILE_ID_CACHE), "r", encoding="UTF-8") as file:
+                entries.append(json.load(file))
+        except (OSError, ValueError):
+            pass
+    entries = [entry for entry in entries if entry.get("file_ids")]
+    if not entries:
+        return {}
+    entry = max(entries, key=lambda entry: entry["fetched"])
+    if max_age is not None and time.time() - entry["fetched"] > max_age:
+        return {}
+    return entry["file_ids"]
+
+def _read_options(schema) -> dict:
+    """Returns the read_csv column options of a schema.
+
+    The options are built once per schema from header.json and schema.json and
+    shared by later calls (see compiled_config), so they must not be modified.
+
+    Args:
+        schema (str): "object" for all strings, or the name of a schema in schema.json.
+
+    Returns:
+        dict: The names, dtype and date parsing options for read_csv.
+
+    Raises:
+        SystemExit: If the schema is not found in the configuration.
+    """
+    return compiled_config(_compile_read_options, ("header", "schema"), schema)
+
+def _compile_read_options(header, schemas, schema) -> dict:
+    """Builds the read_csv column options of _read_options."""
+    if schema == "object":
+        return {"names": header, "dtype": "object"}
+    try:
+        types = schemas[schema]
+    except KeyError as exp:
+        raise SystemExit(f"Unexpected Schema: {schema}") from exp
+
+    string = string_dtype()
+    dtype = {column: types.get(column, "object") for column in header}
+    dates = [column for column, kind in dtype.items() if kind == "datetime"]
+    dtype = {column: string if kind == "string" else kind for column, kind in dtype.items() if column not in dates}
+    return {"names": header, "dtype": dtype, "parse_dates": dates, "date_format": "%Y-%m-%d"}
+
+CHUNK_SIZE = 1024 * 1024
+
 class ZipLoader():
-    """Handles the loading and processing of zip files from a specified URL."""
-    def __init__(self):
-        self.url = "https://www.houjin-bangou.nta.go.jp/download/zenken/"
+    """Handles the loading and processing of zip files from a specified URL.
+
+    Downloads are streamed into a temporary file and the CSV member is parsed
+    directly from the archive, so the payload is never held in memory as a whole.
+    With a cache, downloaded files are kept on disk and reused while the server
+    reports the same ETag/Last-Modified; in offline mode the network is not used.
+    With a Stats, the token, download, uncompress and parse stages are measured.
+    With `parse_workers`, the CSV member is extracted to a temporary file and parsed
+    in that many processes (see read_csv).
+
+    The file IDs of the prefectures are read from the download page fetched for the
+    token, so IDs rotated by the NTA are picked up without updating file_id.json.
+    """
+    URL = "https://www.houjin-bangou.nta.go.jp/download/zenken/"
+
+    def __init__(self, cache=None, offline=False, session=None, schema="object", url=None, stats=None,
+                 parse_workers=None):
+        self.schema = schema
+        self.stats = stats
+        self.parse_workers = parse_workers
+        self.session = session or requests.Session()
+        self.url = url or self.URL
         self.key = "jp.go.nta.houjin_bangou.framework.web.common.CNSFWTokenProcessor.request.token"
-        self.payload = {self.key: self._load_token(self.url, self.key), "event": "download"}
+        self.cache = ZipCache(cache) if isinstance(cache, str) else cache
+        self.offline = offline
+        self.file_ids = {}
+        if offline and self.cache is None:
+            raise SystemExit("Offline mode requires a cache")
+        self.payload = None if offline else self._payload()
+
+    def file_id(self, prefecture="All") -> str:
+        """Returns the file ID of a prefecture.
+
+        The IDs read from the download page are used first. A loader which could not
+        read them, such as an offline one, uses the IDs read by an earlier loader within
+        FILE_ID_TTL seconds (or of any age offline), and then file_id.json.
+
+        Args:
+            prefecture (str): The name of the prefecture, or "All". Defaults to "All".
+
+        Returns:
+            str: The file ID.
 
-    def zip_load(self, file_id) -> pd.DataFrame:
+        Raises:
+            SystemExit: If the prefecture is unknown.
+        """
+        file_ids = self.file_ids or _known_file_ids(self.cache, None if self.offline else FILE_ID_TTL)
+        return _prefecture_2_file_id(prefecture, file_ids)
+
+    def zip_load(self, file_id, progress=None) -> pd.DataFrame:
         """Loads and processes a zip file from the server using a file ID.
 
         Args:
             file_id (str): The file ID to request the zip file.
+            progress (callable, optional): Called with the bytes received so far and the
+                total bytes (or None if the server does not send it) after each chunk.
 
         Returns:
             DataFrame: A DataFrame containing the data from the zip file.
         """
-        contents = self._download_zip(file_id)
-        csv_string = self._uncompress_file(contents)
-        return self._convert_csv_2_df(csv_string)
+        with self._download_zip(file_id, progress) as contents:
+            with self._uncompress_file(contents) as csv_file:
+                return self._convert_csv_2_df(csv_file)
+
+    def zip_load_many(self, file_ids, max_workers=4) -> dict:
+        """Loads several zip files concurrently on a bounded thread pool.
+
+        The downloads share this loader's session and token. Each worker parses its
+        file right after downloading it, so parsing overlaps the remaining downloads.
+
+        Args:
+            file_ids (dict): A mapping of keys (such as prefecture names) to file IDs.
+            max_workers (int): The number of concurrent downloads. Defaults to 4.
+
+        Returns:
+            dict: A mapping of the same keys to DataFrames, in the order of `file_ids`.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {key: executor.submit(self.zip_load, file_id) for key, file_id in file_ids.items()}
+            return {key: future.result() for key, future in futures.items()}
+
+    def iter_zip_load(self, file_id, chunksize):
+        """Loads a zip file from the server and yields its data in batches.
+
+        Args:
+            file_id (str): The file ID to request the zip file.
+            chunksize (int): The number of rows per yielded DataFrame.
+
+        Yields:
+            DataFrame: DataFrames of at most `chunksize` rows.
+        """
+        with self._download_zip(file_id) as contents:
+            with self._uncompress_file(contents) as csv_file:
+                with self._convert_csv_2_df(csv_file, chunksize=chunksize) as reader:
+                    yield from reader if self.stats is None else self.stats.iterate("parse", reader)
+
+    def _payload(self) -> dict:
+        """Loads the token and returns the parameters of the download requests."""
+        return {self.key: self._load_token(self.url, self.key), "event": "download"}
 
     def _load_token(self, url, key) -> str:
         """Loads a security token from the server for requests.
@@ -86,68 +420,211 @@ class ZipLoader():
         Raises:
             SystemExit: If the request fails.
         """
-        try:
-            response = requests.get(url, timeout=(3.0, 60.0))
-            soup = BeautifulSoup(response.text, "html.parser")
-            token = soup.find("input", {"name": key, "type": "hidden"})["value"]
-        except requests.exceptions.RequestException as exp:
-            raise SystemExit(f"Request to {url} has been failure") from exp
+        with measure(self.stats, "token") as record:
+            try:
+                response = self.session.get(url, timeout=(3.0, 60.0))
+                soup = BeautifulSoup(response.text, "html.parser")
+                token = soup.find("input", {"name": key, "type": "hidden"})["value"]
+            except requests.exceptions.RequestException as exp:
+                raise SystemExit(f"Request to {url} has been failure") from exp
+            record["bytes"] = len(response.content)
+            self._parse_page(soup)
         return token
 
-    def _download_zip(self, file_id) -> bytes:
-        """Downloads a zip file from the server using the specified file ID.
+    def _parse_page(self, soup):
+        """Reads the prefectures and file IDs of the Unicode CSV files from the download page.
+
+        Args:
+            soup (BeautifulSoup): The parsed download page.
+        """
+        prefectures = load_config("prefecture")
+        for row in _page_rows(soup):
+            name = row.find(['dt', 'th', 'td'])
+            anchor = row.find('a', onclick=True)
+            file_id = re.search(r'\d{5,}', anchor.get('onclick')) if anchor else None
+            key = prefectures.get(name.get_text(strip=True)) if name else None
+            if key and file_id:
+                self.file_ids[key] = file_id.group()
+        if self.file_ids:
+            _remember_file_ids(self.file_ids, self.cache)
+
+    def _download_zip(self, file_id, progress=None):
+        """Downloads a zip file from the server into a temporary file.
+
+        The response body is streamed to disk in `CHUNK_SIZE` pieces, so memory use
+        does not depend on the size of the file.
 
         Args:
             file_id (str): The file ID to use for the download.
+            progress (callable, optional): Called with the bytes received so far and the
+                total bytes (or None) after each chunk. An exception it raises stops the download.
 
         Returns:
-            bytes: The content of the zip file as bytes.
+            file object: A file positioned at the start of the zip content. Without a
+            cache it is a temporary file that is removed when it is closed.
 
         Raises:
             SystemExit: If the request fails or the server responds with an error.
         """
-        try:
-            self.payload["selDlFileNo"] = file_id
-            res = requests.post(self.url, params=self.payload, timeout=(3.0, 120.0))
-        except requests.exceptions.RequestException as exp:
-            print('Request is failure: Name, server or service not known')
-            raise SystemExit("RequestsExceptions") from exp
-
-        if res.status_code not in [200]:
-            raise SystemExit('Request to ' + self.url + ' has been failed: ' + str(res.status_code))
-        return res.content
-
-    def _uncompress_file(self, content) -> StringIO:
-        """Uncompresses the zip file content and extracts the CSV file.
+        with measure(self.stats, "download", bytes=0) as record:
+            if self.offline:
+                count("cache_hits")
+                return self.cache.open(file_id)
+
+            headers = self.cache.validators(file_id) if self.cache else {}
+            try:
+                params = dict(self.payload, selDlFileNo=file_id)
+                res = self.session.post(self.url, params=params, headers=headers, timeout=(3.0, 120.0), stream=True)
+            except requests.exceptions.RequestException as exp:
+                print('Request is failure: Name, server or service not known')
+                raise SystemExit("RequestsExceptions") from exp
+
+            with res:
+                if self.cache and (res.status_code == 304 or self.cache.is_fresh(file_id, res.headers)):
+                    count("cache_hits")
+                    return self.cache.open(file_id)
+                if res.status_code not in [200]:
+                    raise SystemExit('Request to ' + self.url + ' has been failed: ' + str(res.status_code))
+                total = res.headers.get("Content-Length")
+                chunks = _count_bytes(res.iter_content(chunk_size=CHUNK_SIZE), record, progress,
+                                      int(total) if total else None)
+                if self.cache:
+                    count("cache_misses")
+                    try:
+                        return self.cache.store(file_id, chunks, res.headers.get("ETag"), res.headers.get("Last-Modified"))
+                    except requests.exceptions.RequestException as exp:
+                        raise SystemExit("RequestsExceptions") from exp
+                spool = tempfile.TemporaryFile()
+                try:
+                    for chunk in chunks:
+                        spool.write(chunk)
+                except requests.exceptions.RequestException as exp:
+                    spool.close()
+                    raise SystemExit("RequestsExceptions") from exp
+            spool.seek(0)
+            return spool
+
+    def _uncompress_file(self, content):
+        """Opens the CSV file stored in the zip content.
 
         Args:
-            content (bytes): The content of the zip file as bytes.
+            content (file object or bytes): The zip file as a seekable binary file
+                object, or its content as bytes.
 
         Returns:
-            StringIO: The CSV file content as a StringIO object.
+            file object: A binary file object reading the CSV member of the archive.
 
         Raises:
             zipfile.BadZipFile: If the content is not a valid zip file.
         """
-        try:
-            zip_object = zipfile.ZipFile(io.BytesIO(content))
-        except zipfile.BadZipFile:
-            print("Failed to unzip content. The content may not be a valid zip file.")
-            raise
+        with measure(self.stats, "uncompress") as record:
+            if isinstance(content, (bytes, bytearray)):
+                content = io.BytesIO(content)
+            try:
+                zip_object = zipfile.ZipFile(content)
+            except zipfile.BadZipFile:
+                print("Failed to unzip content. The content may not be a valid zip file.")
+                raise
+
+            for info in zip_object.infolist():
+                if not re.search(r'.*\.asc', info.filename):
+                    record.update(bytes=info.file_size, compressed_bytes=info.compress_size)
+                    return zip_object.open(info)
+
+    def _convert_csv_2_df(self, csv_file, chunksize=None):
+        """Converts CSV content to a DataFrame using predefined headers.
 
-        for file_name in zip_object.namelist():
-            if not re.search(r'.*\.asc', file_name):
-                txt = zip_object.open(file_name).read()
-                return StringIO(txt.decode('utf-8'))
+        Args:
+            csv_file (file object): The CSV content as a binary or text file object.
+            chunksize (int, optional): If given, return an iterator of DataFrames
+                of this many rows instead of a single DataFrame.
 
-    def _convert_csv_2_df(self, csv_string) -> pd.DataFrame:
-        """Converts a CSV string to a DataFrame using predefined headers.
+        Returns:
+            DataFrame or TextFileReader: A DataFrame created from the CSV content,
+            or a reader yielding DataFrames when `chunksize` is given.
+        """
+        if chunksize is not None:
+            return pd.read_csv(csv_file, encoding='utf-8', header=None, chunksize=chunksize, **_read_options(self.schema))
+        if self.parse_workers and self.parse_workers > 1:
+            return self._parallel_convert(csv_file)
+        with measure(self.stats, "parse") as record:
+            df = pd.read_csv(csv_file, encoding='utf-8', header=None, **_read_options(self.schema))
+            record["rows"] = len(df)
+        return df
+
+    def _parallel_convert(self, csv_file) -> pd.DataFrame:
+        """Extracts the CSV content to a temporary file once and parses it in parallel.
 
         Args:
-            csv_string (str): The CSV file content as a string.
+            csv_file (file object): The CSV content as a binary file object.
 
         Returns:
-            DataFrame: A DataFrame created from the CSV string.
+            DataFrame: A DataFrame created from the CSV content.
         """
-        header = load_config("header")
-        return pd.read_csv(csv_string, encoding='utf-8', header=None, names=header, dtype='object')
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        try:
+            with measure(self.stats, "extract") as record:
+                with os.fdopen(handle, "wb") as file:
+                    shutil.copyfileobj(csv_file, file, CHUNK_SIZE)
+                record["bytes"] = os.path.getsize(path)
+            with measure(self.stats, "parse") as record:
+                df = _parallel_read_csv(path, self.parse_workers, self.schema)
+                record["rows"] = len(df)
+            return df
+        finally:
+            os.remove(path)
+
+class DiffLoader(ZipLoader):
+    """Handles the loading of the daily difference (sabun) files.
+
+    The difference files have the same columns as the full data. The download page
+    lists the files of the last 40 days, which are read when the token is loaded.
+    """
+    URL = "https://www.houjin-bangou.nta.go.jp/download/sabun/"
+
+    def file_id(self, date=None) -> str:
+        """Returns the file ID of the difference file for a date.
+
+        Args:
+            date (str, optional): The date as YYYY-MM-DD. Defaults to the latest published file.
+
+        Returns:
+            str: The file ID.
+
+        Raises:
+            SystemExit: If no file is published for the date.
+        """
+        try:
+            return self.file_ids[date or max(self.file_ids)]
+        except (KeyError, ValueError) as exp:
+            raise SystemExit(f"No difference file for the date: {date}") from exp
+
+    def _parse_page(self, soup):
+        """Reads the dates and file IDs of the Unicode CSV difference files.
+
+        Args:
+            soup (BeautifulSoup): The parsed download page.
+        """
+        for row in _page_rows(soup):
+            date = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})日', row.get_text())
+            for anchor in row.find_all('a', onclick=True):
+                file_id = re.search(r'\d{5,}', anchor.get('onclick'))
+                if date and file_id:
+                    key = f"{date.group(1)}-{int(date.group(2)):02d}-{int(date.group(3)):02d}"
+                    self.file_ids[key] = file_id.group()
+
+def _page_rows(soup) -> list:
+    """Returns the rows of the Unicode CSV table of a download page, or [] if there is none."""
+    try:
+        table = soup.find('div', class_='inBox21').find_all('div', class_='tbl02')[1]
+    except (AttributeError, IndexError):
+        return []
+    return table.find_all(['dl', 'tr'])
+
+def _count_bytes(chunks, record, progress=None, total=None):
+    """Passes the chunks of a download through, adding their size to the stage record."""
+    for chunk in chunks:
+        record["bytes"] += len(chunk)
+        if progress is not None:
+            progress(record["bytes"], total)
+        yield chunk
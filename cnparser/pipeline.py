@@ -0,0 +1,177 @@
+'''pipeline.py
+'''
+import os
+import queue
+import threading
+import time
+
+from cnparser.enrich import enrich
+from cnparser.executor import process_context
+from cnparser.load import ZipLoader
+from cnparser.snapshot import save_snapshot
+from cnparser.stats import Stats
+
+STAGES = ("download", "parse", "enrich", "write")
+FORMATS = ("parquet", "csv")
+
+# Marks the end of the items in a stage queue
+_DONE = object()
+
+def run_pipeline(prefectures, output=".", processes=None, file_format="parquet", cache=None, offline=False,
+                 schema="object", workers=None, queue_size=2, executor="auto", kana_cache=None, stats=None) -> Stats:
+    """Downloads, parses, enriches and writes the files of several prefectures as a pipeline.
+
+    Each stage runs on its own threads and passes its results to the next stage through
+    a bounded queue, so a file is parsed while the next one downloads and enriched while
+    the next one is parsed. The wall time of the run approaches that of the slowest
+    stage, and the bounded queues keep at most a few files per stage in memory.
+
+    Args:
+        prefectures (list of str): The prefectures to load, such as ["Tottori", "Shimane"] or ["All"].
+        output (str): The directory of the output files, one per prefecture. Defaults to ".".
+        processes (list of str, optional): The enrich processes. None skips enrichment and
+            an empty list applies all processes.
+        file_format (str): "parquet" (see save_snapshot) or "csv". Defaults to "parquet".
+        cache (ZipCache or str, optional): A cache, or a cache directory, to keep downloaded files in.
+        offline (bool): Load from the cache only, without any network access. Defaults to False.
+        schema (str): The column types, "object" or "compact". Defaults to "object".
+        workers (dict, optional): The number of threads of each stage, keyed by the names in
+            STAGES. Defaults to 4 downloads and 1 thread for the other stages.
+        queue_size (int): The number of files waiting between two stages. Defaults to 2.
+        executor (str): The executor of enrich. Defaults to "auto". Worker processes are
+            started with the "forkserver" method where available and "spawn" otherwise, as
+            forking while the other stages run threads can deadlock the child.
+        kana_cache (KanaCache, optional): The persistent memo used by enrich_kana.
+        stats (Stats, optional): The stats to record into. Defaults to a new Stats.
+
+    Returns:
+        Stats: One record per stage and prefecture, with its 'prefecture', 'seconds',
+        'start' and 'end' (seconds from the start of the run), and 'rows' or 'bytes'.
+
+    Raises:
+        ValueError: If the output format is unknown.
+        SystemExit: If a stage fails, after the stages have stopped.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unexpected output format: {file_format}. Choose from {', '.join(FORMATS)}")
+    workers = {"download": 4, "parse": 1, "enrich": 1, "write": 1, **(workers or {})}
+    stats = stats or Stats()
+    os.makedirs(output, exist_ok=True)
+    loader = ZipLoader(cache=cache, offline=offline, schema=schema)
+    mp_context = process_context()
+    file_ids = {prefecture: loader.file_id(prefecture) for prefecture in prefectures}
+
+    def download(prefecture, _):
+        contents = loader._download_zip(file_ids[prefecture])
+        return contents, {"bytes": os.fstat(contents.fileno()).st_size}
+
+    def parse(_, contents):
+        with contents:
+            with loader._uncompress_file(contents) as csv_file:
+                df = loader._convert_csv_2_df(csv_file)
+        return df, {"rows": len(df)}
+
+    def enrich_frame(_, df):
+        if processes is not None:
+            df = enrich(df, *processes, kana_cache=kana_cache, executor=executor, mp_context=mp_context)
+        return df, {"rows": len(df)}
+
+    def write(prefecture, df):
+        path = os.path.join(output, f"{prefecture}.{file_format}")
+        if file_format == "parquet":
+            save_snapshot(df, path)
+        else:
+            df.to_csv(path, index=False)
+        return None, {"rows": len(df), "bytes": os.path.getsize(path)}
+
+    steps = {"download": download, "parse": parse, "enrich": enrich_frame, "write": write}
+    queues = [queue.Queue()] + [queue.Queue(maxsize=queue_size) for _ in STAGES[1:]] + [None]
+    for prefecture in prefectures:
+        queues[0].put((prefecture, None))
+    queues[0].put(_DONE)
+
+    run = _Run(stats, time.perf_counter())
+    threads = []
+    for i, name in enumerate(STAGES):
+        stage = [threading.Thread(target=run.work, args=(name, steps[name], queues[i], queues[i + 1]), daemon=True)
+                 for _ in range(max(1, workers[name]))]
+        for thread in stage:
+            thread.start()
+        threads.append(stage)
+    for i, stage in enumerate(threads):
+        for thread in stage:
+            thread.join()
+        if queues[i + 1] is not None:
+            queues[i + 1].put(_DONE)
+
+    if run.errors:
+        raise SystemExit(f"Pipeline failed: {run.errors[0]}") from run.errors[0]
+    return stats
+
+def report(stats: Stats) -> str:
+    """Formats the throughput of each stage of a pipeline run.
+
+    Args:
+        stats (Stats): The stats returned by run_pipeline.
+
+    Returns:
+        str: A table of the files, rows, megabytes, busy time, wall time and rows per
+        second of each stage, with the total wall time.
+    """
+    frame = stats.to_frame()
+    lines = [f"{'stage':<10}{'files':>7}{'rows':>12}{'MB':>10}{'busy s':>10}{'wall s':>10}{'rows/s':>12}"]
+    if frame.empty:
+        return "\n".join(lines)
+    for name in STAGES:
+        records = frame[frame["stage"] == name]
+        if records.empty:
+            continue
+        rows = records["rows"].sum() if "rows" in records else 0
+        megabytes = records["bytes"].sum() / 1024 ** 2 if "bytes" in records else 0
+        wall = records["end"].max() - records["start"].min()
+        rate = f"{rows / wall:>12,.0f}" if rows and wall > 0 else f"{'-':>12}"
+        lines.append(f"{name:<10}{len(records):>7}{int(rows):>12,}{megabytes:>10.1f}"
+                     f"{records['seconds'].sum():>10.2f}{wall:>10.2f}{rate}")
+    lines.append(f"total wall time: {frame['end'].max():.2f} s")
+    return "\n".join(lines)
+
+class _Run():
+    """The shared state of the stage threads of a pipeline run."""
+    def __init__(self, stats, origin):
+        self.stats = stats
+        self.origin = origin
+        self.errors = []
+        self.failed = threading.Event()
+
+    def work(self, name, step, inbox, outbox):
+        """Applies a stage step to the items of a queue until it is done.
+
+        After a failure in any stage, the remaining items are taken and dropped, so the
+        other stages are not blocked on full queues and the run ends.
+        """
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                inbox.put(_DONE)
+                return
+            if self.failed.is_set():
+                _close(item[1])
+                continue
+            prefecture, value = item
+            try:
+                start = time.perf_counter()
+                result, counters = step(prefecture, value)
+                end = time.perf_counter()
+            except (Exception, SystemExit) as exp:
+                self.errors.append(exp)
+                self.failed.set()
+                continue
+            self.stats.add({"stage": name, "prefecture": prefecture, "seconds": end - start,
+                            "start": start - self.origin, "end": end - self.origin, **counters})
+            if outbox is not None:
+                outbox.put((prefecture, result))
+
+def _close(value):
+    """Closes a downloaded file dropped after a failure."""
+    if hasattr(value, "close"):
+        value.close()
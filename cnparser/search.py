@@ -0,0 +1,226 @@
+'''search.py
+'''
+import json
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from cnparser.enrich import _legal_entity_regex, _normalize_and_convert_kana
+from cnparser.index import _to_keys, _to_numbers
+
+# Indexed columns and the prefix marking their grams in the vocabulary
+FIELDS = {"name": "n", "furigana": "f", "en_name": "e"}
+FILTERS = ("prefecture_code", "kind")
+GRAM = 2
+
+class NameIndex():
+    """N-gram inverted index over the `name`, `furigana` and `en_name` columns.
+
+    Names are NFKC-normalized and stripped of the legal entity names in legal_entity.json.
+    A query is scored against each column by the Dice coefficient of the bigrams and a
+    row scores its best column. The index is a set of numpy arrays, which save writes as
+    .npy files and load memory-maps.
+    """
+    def __init__(self, arrays: dict):
+        """
+        Args:
+            arrays (dict): The arrays of the index, as built by NameIndex.build or read by NameIndex.load.
+        """
+        self.arrays = arrays
+        self.vocabulary = arrays["vocabulary"]
+        self.offsets = arrays["offsets"]
+        self.postings = arrays["postings"]
+        self.keys = arrays["corporate_number"]
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame):
+        """Builds the index from an enriched DataFrame.
+
+        Args:
+            df (pd.DataFrame): The DataFrame with the 'corporate_number' column and any of the
+                'name', 'furigana', 'en_name', 'prefecture_code' and 'kind' columns.
+
+        Returns:
+            NameIndex: The index.
+        """
+        size = len(df)
+        tokens = {}
+        legal_entity = _legal_entity_regex()
+        doc_parts, gram_parts = [], []
+        arrays = {"corporate_number": _to_keys(df["corporate_number"])}
+
+        for column, prefix in FIELDS.items():
+            if column not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[column])
+            unique_grams = [[tokens.setdefault(prefix + gram, len(tokens))
+                             for gram in _grams(_normalize(column, text, legal_entity))]
+                            for text in uniques]
+            unique_lengths = np.array([len(grams) for grams in unique_grams] + [0], dtype=np.int64)
+            unique_offsets = np.concatenate([[0], np.cumsum(unique_lengths)])
+            flat = np.fromiter((gram for grams in unique_grams for gram in grams), dtype=np.int64)
+
+            lengths = unique_lengths[codes]
+            starts = unique_offsets[codes]
+            ends = np.cumsum(lengths)
+            doc_parts.append(np.repeat(np.arange(size, dtype=np.int64), lengths))
+            gram_parts.append(flat[np.arange(ends[-1] if size else 0) - np.repeat(ends - lengths - starts, lengths)])
+            arrays[f"length_{column}"] = lengths.astype(np.int32)
+
+        vocabulary = np.array(sorted(tokens), dtype=str)
+        remap = np.empty(len(tokens), dtype=np.int64)
+        remap[[tokens[token] for token in vocabulary]] = np.arange(len(tokens))
+        grams = remap[np.concatenate(gram_parts)] if gram_parts else np.empty(0, dtype=np.int64)
+        docs = np.concatenate(doc_parts) if doc_parts else np.empty(0, dtype=np.int64)
+        order = np.argsort(grams, kind="stable")
+
+        arrays["vocabulary"] = vocabulary
+        arrays["offsets"] = np.searchsorted(grams[order], np.arange(len(vocabulary) + 1)).astype(np.int64)
+        arrays["postings"] = docs[order].astype(np.int32)
+        for column in FILTERS:
+            if column in df.columns:
+                arrays[column] = np.array(df[column].astype(object).fillna("").astype(str), dtype=str)
+        return cls(arrays)
+
+    def search(self, query: str, k=10, prefecture_code=None, kind=None) -> pd.DataFrame:
+        """Finds the rows whose names are most similar to a query.
+
+        Args:
+            query (str): The company name to look for, in kanji, kana or English.
+            k (int): The number of results. Defaults to 10.
+            prefecture_code (str or list of str, optional): Only return rows of these prefectures.
+            kind (str or list of str, optional): Only return rows of these kinds.
+
+        Returns:
+            pd.DataFrame: The 'corporate_number', 'position' (the row in the indexed DataFrame)
+            and 'score' of the results, best first.
+        """
+        candidates, scores = [], []
+        legal_entity = _legal_entity_regex()
+        for column, prefix in FIELDS.items():
+            if f"length_{column}" not in self.arrays:
+                continue
+            text = _normalize(column, query, legal_entity)
+            if column == "furigana" and text:
+                text = _normalize_and_convert_kana(text, legal_entity)
+            docs, shared = self._match([prefix + gram for gram in set(_grams(text))])
+            if len(docs) == 0:
+                continue
+            length = self.arrays[f"length_{column}"][docs]
+            candidates.append(docs)
+            scores.append(2 * shared / (len(set(_grams(text))) + length))
+
+        if not candidates:
+            return _results(np.empty(0, dtype=np.int64), np.empty(0), self.keys)
+        docs = np.concatenate(candidates)
+        score = np.concatenate(scores)
+        mask = self._filter(docs, prefecture_code, kind)
+        docs, score = docs[mask], score[mask]
+
+        order = np.argsort(-score, kind="stable")
+        docs, score = docs[order], score[order]
+        docs, first = np.unique(docs, return_index=True)
+        score = score[first]
+        top = np.argsort(-score, kind="stable")[:k]
+        return _results(docs[top], score[top], self.keys)
+
+    def search_many(self, queries, k=10, prefecture_code=None, kind=None) -> pd.DataFrame:
+        """Runs search for several queries.
+
+        Args:
+            queries (iterable of str): The company names to look for.
+            k (int): The number of results per query. Defaults to 10.
+            prefecture_code (str or list of str, optional): Only return rows of these prefectures.
+            kind (str or list of str, optional): Only return rows of these kinds.
+
+        Returns:
+            pd.DataFrame: The results of search with a 'query' column.
+        """
+        results = [self.search(query, k, prefecture_code, kind).assign(query=query) for query in queries]
+        columns = ["query", "corporate_number", "position", "score"]
+        if not results:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(results, ignore_index=True)[columns]
+
+    def save(self, path: str):
+        """Saves the index as a directory of .npy files.
+
+        Args:
+            path (str): The destination directory.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        with open(os.path.join(path, "index.json"), "w", encoding="UTF-8") as file:
+            json.dump({"arrays": list(self.arrays), "gram": GRAM}, file)
+
+    @classmethod
+    def load(cls, path: str, mmap=True):
+        """Loads an index saved by save.
+
+        Args:
+            path (str): The index directory.
+            mmap (bool): Memory-map the arrays instead of reading them. Defaults to True.
+
+        Returns:
+            NameIndex: The index.
+        """
+        with open(os.path.join(path, "index.json"), "r", encoding="UTF-8") as file:
+            names = json.load(file)["arrays"]
+        mode = "r" if mmap else None
+        return cls({name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in names})
+
+    def _match(self, grams):
+        """Returns the rows sharing any of the grams, with the number of grams they share."""
+        if not grams:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        grams = np.array(grams, dtype=str)
+        ids = np.searchsorted(self.vocabulary, grams).clip(0, max(len(self.vocabulary) - 1, 0))
+        ids = ids[self.vocabulary[ids] == grams] if len(self.vocabulary) else ids[:0]
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        postings = np.concatenate([self.postings[self.offsets[i]:self.offsets[i + 1]] for i in ids])
+        return np.unique(postings.astype(np.int64), return_counts=True)
+
+    def _filter(self, docs, prefecture_code, kind) -> np.ndarray:
+        """Returns the mask of the rows matching the prefecture and kind filters."""
+        mask = np.ones(len(docs), dtype=bool)
+        for column, values in (("prefecture_code", prefecture_code), ("kind", kind)):
+            if values is None:
+                continue
+            if column not in self.arrays:
+                raise SystemExit(f"The index has no {column} column to filter by")
+            values = [values] if isinstance(values, str) else list(values)
+            mask &= np.isin(self.arrays[column][docs], values)
+        return mask
+
+def _normalize(column: str, text, legal_entity) -> str:
+    """Normalizes a name for indexing and querying, with the regex of _legal_entity_regex."""
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKC", text)
+    if column == "name":
+        text = legal_entity.sub("", text)
+    elif column == "en_name":
+        text = re.sub(r"[^0-9a-z]", "", text.casefold())
+    return re.sub(r"\s+", "", text.casefold())
+
+def _grams(text: str) -> list:
+    """Splits a text into overlapping n-grams, or the text itself if it is shorter."""
+    if len(text) <= GRAM:
+        return [text] if text else []
+    return [text[i:i + GRAM] for i in range(len(text) - GRAM + 1)]
+
+def _results(docs, scores, keys) -> pd.DataFrame:
+    """Builds the result DataFrame of a search."""
+    return pd.DataFrame({
+        "corporate_number": _to_numbers(np.asarray(keys)[docs]),
+        "position": docs,
+        "score": scores,
+    })
@@ -0,0 +1,82 @@
+'''snapshot.py
+'''
+import os
+
+import pandas as pd
+
+# Low-cardinality columns stored as dictionary-encoded categoricals
+CATEGORY_COLUMNS = ["kind", "prefecture_name", "prefecture_code", "process", "latest", "legal_entity"]
+
+def save_snapshot(df: pd.DataFrame, path: str, file_format=None):
+    """Saves a DataFrame as a columnar Parquet or Feather file.
+
+    The low-cardinality columns in CATEGORY_COLUMNS are dictionary-encoded. Feather
+    files are written uncompressed so that open_snapshot can memory-map them.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to be saved, enriched or not.
+        path (str): The destination file.
+        file_format (str, optional): "parquet" or "feather". Defaults to the file extension,
+            Feather for .feather and .arrow and Parquet otherwise.
+    """
+    pa, feather, parquet = _import_pyarrow()
+    frame = df.copy(deep=False)
+    for column in CATEGORY_COLUMNS:
+        if column in frame.columns and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype('category')
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+
+    if _file_format(path, file_format) == "feather":
+        feather.write_feather(table, path, compression="uncompressed")
+    else:
+        parquet.write_table(table, path)
+
+def open_snapshot(path: str, columns=None, filters=None, file_format=None) -> pd.DataFrame:
+    """Opens a snapshot saved by save_snapshot.
+
+    Only the requested columns are read, and rows are filtered while reading. Parquet
+    files are read through a memory map with predicate pushdown to row groups; Feather
+    files are memory-mapped, so unfiltered columns are not copied until pandas needs them.
+    String columns are returned as Arrow-backed `pd.ArrowDtype(pa.string())` columns
+    wrapping the Arrow buffers, rather than copied into Python objects.
+
+    Args:
+        path (str): The snapshot file.
+        columns (list of str, optional): The columns to read. Defaults to all columns.
+        filters (list of tuple, optional): Row filters in the pyarrow format, such as
+            [("prefecture_code", "==", "31")]. Defaults to no filter.
+        file_format (str, optional): "parquet" or "feather". Defaults to the file extension.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the categorical columns restored and Arrow-backed
+        string columns.
+    """
+    pa, feather, parquet = _import_pyarrow()
+    if _file_format(path, file_format) == "feather":
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        if filters:
+            table = table.filter(parquet.filters_to_expression(filters))
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        table = parquet.read_table(path, columns=columns, filters=filters, memory_map=True)
+    strings = {pa.string(): pd.ArrowDtype(pa.string()), pa.large_string(): pd.ArrowDtype(pa.large_string())}
+    return table.to_pandas(types_mapper=strings.get)
+
+def _file_format(path, file_format) -> str:
+    """Resolves the snapshot format from the argument or the file extension."""
+    if file_format is not None:
+        if file_format not in ("parquet", "feather"):
+            raise ValueError(f"Unexpected snapshot format: {file_format}")
+        return file_format
+    return "feather" if os.path.splitext(path)[1] in (".feather", ".arrow") else "parquet"
+
+def _import_pyarrow():
+    """Imports pyarrow, which is an optional dependency of the snapshot functions."""
+    try:
+        import pyarrow
+        from pyarrow import feather, parquet
+    except ImportError as exc:
+        raise ImportError("pyarrow is required for snapshots: pip install cnparser[snapshot]") from exc
+    return pyarrow, feather, parquet
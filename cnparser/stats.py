@@ -0,0 +1,194 @@
+'''stats.py
+'''
+import contextlib
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+
+import pandas as pd
+
+# The record of the stage being measured in the current thread, read by count
+_current = ContextVar("cnparser_stage", default=None)
+
+class Stats():
+    """Per-stage measurements of a load or enrich run.
+
+    Pass a Stats to ZipLoader, load or enrich to record one entry per stage with its
+    wall time ('seconds') and, where they apply, the 'bytes' transferred or read, the
+    'rows' processed and the 'cache_hits' and 'cache_misses'. With `trace_memory`,
+    the tracemalloc peak of Python allocations during the stage is recorded as
+    'peak_memory'. Nothing is measured when no Stats is passed.
+    """
+    def __init__(self, hooks=None, trace_memory=False):
+        """
+        Args:
+            hooks (list of callable, optional): Functions called with each record as soon
+                as its stage completes.
+            trace_memory (bool): Record the peak memory of each stage with tracemalloc,
+                which slows allocations down while it is tracing. Tracing is stopped again
+                after the stages unless it was already on. Defaults to False.
+        """
+        self.records = []
+        self.hooks = list(hooks or [])
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(list(self.records))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["hooks"] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """Registers a function called with each record as soon as its stage completes.
+
+        Args:
+            hook (callable): The function taking a record dict.
+        """
+        self.hooks.append(hook)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **counters):
+        """Measures the stage run inside the context.
+
+        Args:
+            name (str): The stage name, such as "download" or "enrich_kana".
+            **counters: Initial values of the record, such as rows=100.
+
+        Yields:
+            dict: The record of the stage, whose counters the stage may update.
+        """
+        record = {"stage": name, **counters}
+        if self.trace_memory:
+            _tracing.acquire()
+        token = _current.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            _current.reset(token)
+            if self.trace_memory:
+                record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                _tracing.release()
+            self.add(record)
+
+    def iterate(self, name: str, iterable):
+        """Measures each step of an iterator of DataFrames as a stage with its row count.
+
+        Args:
+            name (str): The stage name.
+            iterable (iterable of DataFrame): The iterator to measure.
+
+        Yields:
+            DataFrame: The items of `iterable`.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as record:
+                item = next(iterator, None)
+                record["rows"] = 0 if item is None else len(item)
+            if item is None:
+                return
+            yield item
+
+    def add(self, record: dict):
+        """Appends a record and passes it to the hooks.
+
+        Args:
+            record (dict): The record, with at least the 'stage' and 'seconds' keys.
+        """
+        with self._lock:
+            self.records.append(record)
+        for hook in self.hooks:
+            hook(record)
+
+    def extend(self, records):
+        """Appends records measured elsewhere, such as in worker processes."""
+        for record in records:
+            self.add(record)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns the records as a DataFrame with one row per measured stage."""
+        return pd.DataFrame(list(self.records))
+
+    def summary(self) -> pd.DataFrame:
+        """Returns the totals per stage name, in the order the stages were first seen.
+
+        'seconds', 'bytes', 'rows' and the cache counters are summed, 'peak_memory'
+        is the maximum and 'calls' is the number of records.
+        """
+        frame = self.to_frame()
+        if frame.empty:
+            return pd.DataFrame(columns=["calls", "seconds"])
+        aggregations = {column: "max" if column == "peak_memory" else "sum"
+                        for column in frame.columns if column != "stage"}
+        grouped = frame.groupby("stage", sort=False)
+        return grouped.agg(aggregations).assign(calls=grouped.size())[["calls", *aggregations]]
+
+class _Tracing():
+    """Starts tracemalloc for the traced stages running in the process and stops it after the last.
+
+    Tracing started by the caller before the first stage is left on.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = 0
+        self._started = False
+
+    def acquire(self):
+        """Starts tracing if it is off and resets the peak for a stage."""
+        with self._lock:
+            if self._stages == 0:
+                self._started = not tracemalloc.is_tracing()
+                if self._started:
+                    tracemalloc.start()
+            self._stages += 1
+            tracemalloc.reset_peak()
+
+    def release(self):
+        """Stops tracing after the last stage, if a stage started it."""
+        with self._lock:
+            self._stages -= 1
+            if self._stages == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+_tracing = _Tracing()
+
+def measure(stats, name: str, **counters):
+    """Returns the context measuring a stage, which does nothing if `stats` is None.
+
+    Args:
+        stats (Stats or None): The stats to record into.
+        name (str): The stage name.
+        **counters: Initial values of the record.
+
+    Returns:
+        context manager: The context yielding the record of the stage.
+    """
+    if stats is None:
+        return contextlib.nullcontext(counters)
+    return stats.stage(name, **counters)
+
+def count(name: str, value=1):
+    """Adds to a counter, such as 'cache_hits', of the stage being measured in this thread.
+
+    Args:
+        name (str): The counter name.
+        value (int): The amount to add. Defaults to 1.
+    """
+    record = _current.get()
+    if record is not None:
+        record[name] = record.get(name, 0) + value
@@ -0,0 +1,40 @@
+'''update.py
+'''
+import pandas as pd
+
+from cnparser.enrich import enrich
+from cnparser.executor import concat_chunks
+
+# Process code of records deleted from the publication site
+DELETED = "99"
+
+def apply_updates(snapshot: pd.DataFrame, diff: pd.DataFrame, *processes, enrich_rows=True) -> pd.DataFrame:
+    """
+    Applies a difference (sabun) file to a stored snapshot of the full data.
+
+    The difference records are ordered by `sequence_number`, with records whose number is
+    missing or malformed after the others in their file order, and only the last record
+    flagged as `latest` of each `corporate_number` is applied. It replaces the record in
+    the snapshot, or is appended for a new corporate number. Deleted records
+    (process 99) are removed from the snapshot.
+
+    Args:
+        snapshot (pd.DataFrame): The full data, enriched or not.
+        diff (pd.DataFrame): The difference records, as loaded by load_diff.
+        *processes (str): The enrich processes to apply to the changed records.
+        enrich_rows (bool): Run enrich on the changed records. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The updated snapshot.
+    """
+    order = pd.to_numeric(diff['sequence_number'], errors='coerce')
+    changes = diff.assign(_seq=order).sort_values('_seq', kind='stable', na_position='last').drop(columns='_seq')
+    changes = changes[changes['latest'].astype(str) == '1']
+    changes = changes.drop_duplicates('corporate_number', keep='last')
+
+    upserts = changes[changes['process'].astype(str) != DELETED]
+    if enrich_rows and len(upserts) > 0:
+        upserts = enrich(upserts.copy(), *processes)
+
+    kept = snapshot[~snapshot['corporate_number'].isin(changes['corporate_number'])]
+    return concat_chunks([kept.copy(deep=False), upserts])
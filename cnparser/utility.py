@@ -1,30 +1,106 @@
 """ Utility
 It is utility functions class.
 """
+import importlib.util
 import json
 import os
+import threading
+import time
+from functools import lru_cache
+from importlib.resources import files
 
 import cnparser
-import pkg_resources
 
+# Directories searched for config files before the package config directory,
+# separated by os.pathsep
+CONFIG_PATH_ENV = "CNPARSER_CONFIG_PATH"
+# Seconds between checks of the modification time of a loaded config file.
+# None never checks again, so loaded configs never touch the filesystem.
+CONFIG_CHECK_INTERVAL = 5.0
+
+_config_dirs = []
+_configs = {}
+_artifacts = {}
+_config_lock = threading.Lock()
 
 def load_config(data_type:str) -> str:
     """ The function loads configuration file from config directory
     :param data_type: Category is identifier of data types such as ENTRY, ODDS, RACE and RESULT.
+
+    A config is read once and kept in memory. The file is looked up in the directories
+    added by add_config_dir, then in CNPARSER_CONFIG_PATH, then in the package, and it
+    is read again when its modification time changes, checked at most once every
+    CONFIG_CHECK_INTERVAL seconds. The returned object is shared and must not be modified.
+    """
+    entry = _configs.get(data_type)
+    if entry is not None and (CONFIG_CHECK_INTERVAL is None or time.monotonic() - entry["checked"] < CONFIG_CHECK_INTERVAL):
+        return entry["value"]
+    with _config_lock:
+        try:
+            path = _config_path(data_type)
+            mtime = os.stat(path).st_mtime_ns
+            if entry is None or entry["path"] != path or entry["mtime"] != mtime:
+                with open(path, 'r', encoding='UTF-8') as file:
+                    entry = {"path": path, "mtime": mtime, "value": json.load(file)}
+            entry["checked"] = time.monotonic()
+            _configs[data_type] = entry
+            return entry["value"]
+        except json.JSONDecodeError as exc:
+            raise SystemExit(f'Config file decode error: {exc}') from exc
+        except FileNotFoundError as exc:
+            raise SystemExit(f'Config file not found: {exc}') from exc
+
+def compiled_config(build, data_types, *args):
+    """ The function returns an artifact built from config files, such as a compiled regex
+    :param build: The function building the artifact from the configs of data_types followed by args.
+    :param data_types: The config names the artifact is built from.
+    :param args: Additional hashable arguments of build, which are part of the memo key.
+
+    The artifact is built once and rebuilt only when one of the configs is read again.
+    """
+    values = tuple(load_config(data_type) for data_type in data_types)
+    key = (build, tuple(data_types), args)
+    entry = _artifacts.get(key)
+    if entry is None or any(old is not new for old, new in zip(entry[0], values)):
+        entry = (values, build(*values, *args))
+        _artifacts[key] = entry
+    return entry[1]
+
+def add_config_dir(path:str):
+    """ The function adds a directory whose config files override the package config files
+    :param path: The directory. Directories added later take precedence.
+    """
+    with _config_lock:
+        _config_dirs.insert(0, path)
+    clear_config_cache()
+
+def clear_config_cache():
+    """ The function drops the loaded configs and artifacts, so they are read again on next use
+    """
+    with _config_lock:
+        _configs.clear()
+        _artifacts.clear()
+
+def _config_path(data_type:str) -> str:
+    """ The function returns the path of the config file of a data type
+    """
+    directories = _config_dirs + [path for path in os.environ.get(CONFIG_PATH_ENV, "").split(os.pathsep) if path]
+    for directory in directories:
+        path = os.path.join(directory, data_type + '.json')
+        if os.path.isfile(path):
+            return path
+    return os.path.join(os.path.dirname(cnparser.__file__), 'config', data_type + '.json')
+
+@lru_cache(maxsize=None)
+def string_dtype() -> str:
+    """ The function returns the pandas string dtype, backed by Arrow when pyarrow is installed.
     """
-    try:
-        dir_location = os.path.dirname(cnparser.__file__) + '/config/'
-        with open(dir_location + data_type + '.json', 'r', encoding='UTF-8') as file:
-            return json.load(file)
-    except json.JSONDecodeError as exc:
-        raise SystemExit(f'Config file decode error: {exc}') from exc
-    except FileNotFoundError as exc:
-        raise SystemExit(f'Config file not found: {exc}') from exc
+    return "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
 
 def load_api() -> str:
     resource_path = 'config/api/ja.json'  # パッケージ内のリソースへのパス
-    if pkg_resources.resource_exists(__name__, resource_path):
-        file_path = pkg_resources.resource_filename(__name__, resource_path)
-        return 'file://' + file_path.replace('.json', '')
+    resource = files(cnparser).joinpath(resource_path)
+    if resource.is_file():
+        return 'file://' + str(resource).replace('.json', '')
     else:
         raise FileNotFoundError(f"No such file or directory: '{resource_path}'")
\ No newline at end of file
@@ -14,7 +14,9 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     license = 'Apache-2.0 license',
-    install_requires=['requests', 'bs4', 'pandas', 'pandarallel', 'pykakasi'],
+    install_requires=['requests', 'bs4', 'pandas>=2.0', 'pykakasi'],
+    extras_require={'snapshot': ['pyarrow']},
     packages=find_packages(),
     package_data={'': ['config/*.json']},
+    entry_points={'console_scripts': ['cnparser=cnparser.__main__:main']},
 )
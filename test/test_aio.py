@@ -0,0 +1,161 @@
+""" test_aio.py
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pandas as pd
+from cnparser.aio import aload, AsyncZipLoader, _Cancellation
+from cnparser.load import ZipLoader
+
+from test.test_load import FakeResponse, _zip_bytes
+
+class TestAsyncZipLoader(unittest.TestCase):
+    def setUp(self):
+        """Replace the network calls of ZipLoader with a local zip archive."""
+        with open('cnparser/config/header.json', 'r') as file:
+            self.expected_columns = json.load(file)
+        self.content = _zip_bytes()
+        response = FakeResponse(self.content, headers={'Content-Length': str(len(self.content))})
+        patchers = [mock.patch('requests.Session.get', return_value=response),
+                    mock.patch('requests.Session.post', return_value=response),
+                    mock.patch('cnparser.load.CHUNK_SIZE', 64),
+                    mock.patch.dict('cnparser.load._discovered_file_ids', clear=True)]
+        self.get, self.post, _, _ = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_zip_load(self):
+        """Test that the token is deferred to start and the result matches ZipLoader."""
+        async def run():
+            loader = AsyncZipLoader()
+            self.assertIsNone(loader.payload)
+            self.assertEqual(self.get.call_count, 0)
+            return await loader.zip_load('00000')
+
+        result = asyncio.run(run())
+        self.assertEqual(self.get.call_count, 1)
+        pd.testing.assert_frame_equal(result, ZipLoader().zip_load('00000'))
+
+    def test_progress(self):
+        """Test that progress is called on the event loop thread for each chunk."""
+        calls = []
+        threads = set()
+
+        def progress(received, total):
+            calls.append((received, total))
+            threads.add(threading.get_ident())
+
+        asyncio.run(AsyncZipLoader().zip_load('00000', progress=progress))
+        self.assertEqual(len(calls), -(-len(self.content) // 64))
+        self.assertEqual(calls[-1], (len(self.content), len(self.content)))
+        self.assertEqual(threads, {threading.get_ident()})
+
+    def test_cancel(self):
+        """Test that a cancelled zip_load stops its download."""
+        received = []
+
+        async def run():
+            started = asyncio.Event()
+
+            def progress(count, _):
+                received.append(count)
+                started.set()
+
+            with mock.patch('cnparser.load._count_bytes', side_effect=_slow_count_bytes):
+                task = asyncio.create_task(AsyncZipLoader().zip_load('00000', progress=progress))
+                await started.wait()
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+        self.assertLess(received[-1], len(self.content))
+
+    def test_cancel_extraction(self):
+        """Test that a zip_load cancelled while extracting stops and removes its temporary file."""
+        reads = []
+        started = threading.Event()
+
+        def slow_read(size=-1):
+            reads.append(size)
+            started.set()
+            threading.Event().wait(0.02)
+            return b'x' * 64
+
+        async def run():
+            with mock.patch('cnparser.aio.CHUNK_SIZE', 64), \
+                 mock.patch.object(AsyncZipLoader, '_uncompress_file') as uncompress:
+                uncompress.return_value.__enter__.return_value.read.side_effect = slow_read
+                task = asyncio.create_task(AsyncZipLoader().zip_load('00000'))
+                while not started.is_set():
+                    await asyncio.sleep(0.01)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                await asyncio.sleep(0.2)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with mock.patch('tempfile.tempdir', tmp_dir):
+                asyncio.run(run())
+            self.assertEqual(os.listdir(tmp_dir), [])
+        count = len(reads)
+        threading.Event().wait(0.1)
+        self.assertEqual(len(reads), count)
+
+    def test_cancel_after_hand_over(self):
+        """Test that a file handed over just before the cancellation is seen is removed."""
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        cancellation = _Cancellation()
+        self.assertEqual(cancellation.hand_over(path), path)
+        cancellation.cancel()
+        self.assertFalse(os.path.exists(path))
+
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        with self.assertRaises(asyncio.CancelledError):
+            cancellation.hand_over(path)
+        self.assertFalse(os.path.exists(path))
+
+    def test_refresh(self):
+        """Test that refresh replaces the token parameters."""
+        async def run():
+            loader = AsyncZipLoader()
+            await loader.start()
+            payload = loader.payload
+            await loader.refresh_in_background()
+            return payload, loader.payload
+
+        before, after = asyncio.run(run())
+        self.assertIsNot(before, after)
+        self.assertEqual(before, after)
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_aload(self):
+        """Test that aload loads a list of prefectures with one token request."""
+        calls = []
+        frames = asyncio.run(aload(['Tottori', 'Shimane'], as_dict=True,
+                                   progress=lambda *args: calls.append(args)))
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(list(frames), ['Tottori', 'Shimane'])
+        self.assertEqual(len(frames['Shimane']), 5)
+        self.assertEqual({call[0] for call in calls}, {'Tottori', 'Shimane'})
+
+        result = asyncio.run(aload(['Tottori', 'Shimane'], max_workers=1))
+        self.assertEqual(list(result.columns), self.expected_columns)
+        self.assertEqual(len(result), 10)
+
+def _slow_count_bytes(chunks, record, progress=None, total=None):
+    """Counts the chunks of a download like _count_bytes, slowly enough to be cancelled."""
+    for chunk in chunks:
+        record["bytes"] += len(chunk)
+        if progress is not None:
+            progress(record["bytes"], total)
+        threading.Event().wait(0.02)
+        yield chunk
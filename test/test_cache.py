@@ -0,0 +1,89 @@
+""" test_cache.py
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cnparser.cache import KanaCache, ZipCache
+from cnparser.enrich import enrich_kana
+from cnparser.load import load, read_csv
+from test.test_load import FakeResponse, _zip_bytes
+
+class TestZipCache(unittest.TestCase):
+    def setUp(self):
+        """Create an empty cache in a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = ZipCache(self.tmp_dir.name)
+
+    def test_store_and_open(self):
+        """Test that a stored file is recorded with its size and validators."""
+        with self.cache.store('00001', [b'abc', b'def'], etag='"v1"') as file:
+            self.assertEqual(file.read(), b'abcdef')
+        entry = self.cache.get('00001')
+        self.assertEqual(entry['size'], 6)
+        self.assertEqual(entry['etag'], '"v1"')
+        self.assertEqual(len(entry['sha256']), 64)
+        self.assertTrue(self.cache.is_fresh('00001', {'ETag': '"v1"'}))
+        self.assertFalse(self.cache.is_fresh('00001', {'ETag': '"v2"'}))
+
+    def test_eviction(self):
+        """Test that the least recently used file is evicted past max_bytes."""
+        cache = ZipCache(self.tmp_dir.name, max_bytes=10)
+        cache.store('00001', [b'123456']).close()
+        cache.store('00002', [b'123456']).close()
+        self.assertIsNone(cache.get('00001'))
+        self.assertFalse(os.path.exists(cache.path('00001')))
+        self.assertIsNotNone(cache.get('00002'))
+
+    def test_load_from_cache(self):
+        """Test that an unchanged file is not downloaded twice and can be loaded offline."""
+        content = _zip_bytes()
+        headers = {'ETag': '"v1"', 'Content-Length': str(len(content))}
+        with mock.patch('requests.Session.get', return_value=FakeResponse(b'')), \
+             mock.patch('requests.Session.post', return_value=FakeResponse(content, headers=headers)):
+            first = load('Tottori', cache=self.cache)
+        self.assertEqual(len(first), 5)
+
+        with mock.patch('requests.Session.get', return_value=FakeResponse(b'')), \
+             mock.patch('requests.Session.post', return_value=FakeResponse(b'', headers=headers)) as post:
+            second = load('Tottori', cache=self.cache)
+        self.assertEqual(post.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertTrue(second.equals(first))
+
+        with mock.patch('requests.Session.get') as get, mock.patch('requests.Session.post') as post:
+            offline = load('Tottori', cache=self.tmp_dir.name, offline=True)
+        get.assert_not_called()
+        post.assert_not_called()
+        self.assertTrue(offline.equals(first))
+
+class TestKanaCache(unittest.TestCase):
+    def setUp(self):
+        """Create an empty kana memo in a temporary directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = KanaCache(os.path.join(self.tmp_dir.name, 'kana.sqlite3'))
+        self.addCleanup(self.cache.close)
+
+    def test_get_and_put(self):
+        """Test that conversions are stored per version and evicted past max_entries."""
+        self.cache.put_many({'山田建設': 'ヤマダケンセツ', '島田商事': 'シマダショウジ'}, 'v1')
+        self.assertEqual(self.cache.get_many(['山田建設', '鈴木'], 'v1'), {'山田建設': 'ヤマダケンセツ'})
+        self.assertEqual(self.cache.get_many(['山田建設'], 'v2'), {})
+
+        self.cache.max_entries = 2
+        self.cache.put_many({'鈴木': 'スズキ'}, 'v1')
+        self.assertEqual(len(self.cache), 2)
+
+    def test_enrich_kana_with_cache(self):
+        """Test that names already in the memo are not converted again."""
+        df = read_csv('./test/data/31_tottori_test_20240329.csv')
+        first = enrich_kana(df.copy(), cache=self.cache)
+        with mock.patch('cnparser.enrich._convert_to_kana') as convert:
+            second = enrich_kana(df.copy(), cache=self.cache)
+        convert.assert_not_called()
+        self.assertTrue(second['furigana'].equals(first['furigana']))
+
+if __name__ == '__main__':
+    unittest.main()
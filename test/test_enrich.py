@@ -2,7 +2,7 @@
 """
 import pandas as pd
 import unittest
-from cnparser.enrich import enrich, standardization, enrich_kana, enrich_kind, enrich_post_code
+from cnparser.enrich import enrich, plan_enrich, standardization, enrich_kana, enrich_kind, enrich_post_code, enrich_address, _transliterate
 from cnparser.load import read_csv
 
 class TestEnrich(unittest.TestCase):
@@ -22,14 +22,43 @@ class TestEnrich(unittest.TestCase):
         for i, val in enumerate(expected_street):
             self.assertEqual(self.df.iloc[i]['street_number'], val)
 
+    def test_standardization_skips_code_columns(self):
+        """Test that code columns are left as they are and missing values are kept."""
+        df = pd.DataFrame({'name': ['ＡＢＣ', None, 'ＡＢＣ'], 'kind': ['３０１', '３０１', None]})
+        result = standardization(df)
+        self.assertEqual(list(result['name'][[0, 2]]), ['ABC', 'ABC'])
+        self.assertIs(result['name'][0], result['name'][2])
+        self.assertIsNone(result['name'][1])
+        self.assertEqual(list(result['kind'][:2]), ['３０１', '３０１'])
+
+    def test_standardization_keeps_dtypes(self):
+        """Test that categorical and string columns keep their dtype."""
+        df = pd.DataFrame({'name': pd.Series(['ＡＢＣ', None], dtype='string'),
+                           'prefecture_name': pd.Series(['東京都', 'ＴＯＫＹＯ'], dtype='category')})
+        result = standardization(df)
+        self.assertEqual(result['name'].dtype, 'string')
+        self.assertEqual(result['name'][0], 'ABC')
+        self.assertIsInstance(result['prefecture_name'].dtype, pd.CategoricalDtype)
+        self.assertEqual(result['prefecture_name'][1], 'TOKYO')
+
     def test_enrich_kana(self):
         """Test the enrich_kana function to ensure it correctly adds the 'std_furigana' column."""
         result = enrich_kana(self.df.copy())
         self.assertIn('furigana', result.columns)
-        expected_furigana = ['トットリカンイサイバンショ', 'シマダショウジ', 'souvenir', 'T&Mコンサルティング', 'HAPカンコウ']
+        expected_furigana = ['トットリカンイサイバンショ', 'シマダショウジ', 'スーベニア', 'TアンドMコンサルティング', 'ハップカンコウ']
         for i, furigana in enumerate(expected_furigana):
             self.assertEqual(result.iloc[i]['furigana'], furigana)
 
+    def test_transliterate(self):
+        """Test that only words made up entirely of dictionary words are replaced."""
+        self.assertEqual(_transliterate('Copel & SAP'), 'コペル アンド エスエーピー')
+        self.assertEqual(_transliterate('SYSTEMS'), 'システムズ')
+        self.assertEqual(_transliterate('SystemSupport'), 'システムサポート')
+        self.assertEqual(_transliterate('T&M'), 'TアンドM')
+        for word in ['XSystem', 'SAPPORO', 'HAPPY', 'Careers', 'Kansas', 'Lifeline']:
+            self.assertEqual(_transliterate(word), word)
+        self.assertEqual(_transliterate('島田商事'), '島田商事')
+
     def test_enrich_kind(self):
         """Test the enrich_kind function to ensure it correctly maps 'kind' to 'std_legal_entity'."""
         result = enrich_kind(self.df.copy())
@@ -46,18 +75,90 @@ class TestEnrich(unittest.TestCase):
         for i, entity in enumerate(expected_entities):
             self.assertEqual(result.iloc[i]['post_code'], entity)
 
+    def test_enrich_postcode_validate(self):
+        """Test that the validation mode flags malformed postal codes."""
+        df = pd.DataFrame({'post_code': ['6800011', '68000', None, '680001A']})
+        result = enrich_post_code(df, validate=True)
+        self.assertEqual(list(result['post_code_valid'].fillna(False)), [True, False, False, False])
+        self.assertTrue(pd.isna(result['post_code_valid'][2]))
+        self.assertEqual(result['post_code'][0], '680-0011')
+
+    def test_enrich_address(self):
+        """Test that street addresses get a normalized key and the city a partition key."""
+        result = enrich_address(self.df.copy())
+        self.assertEqual(list(result['address_key']), ['東町2-223', '安来町1578', '安来町1193', '東出雲町揖屋843', '天神町70-12'])
+        self.assertEqual(list(result['city_key']), [31201, 32206, 32206, 32201, 32203])
+
+        df = pd.DataFrame({'street_number': ['東町二丁目２２３番地', '一番町四丁目三番二十五号', '本町1丁目2番地の3', None],
+                           'prefecture_code': ['31', '04', '13', None], 'city_code': ['201', '101', '101', '101']})
+        result = enrich_address(df)
+        self.assertEqual(list(result['address_key'][:3]), ['東町2-223', '一番町4-3-25', '本町1-2-3'])
+        self.assertIsNone(result['address_key'][3])
+        self.assertTrue(pd.isna(result['city_key'][3]))
+
     def test_enrich_all_processes(self):
         """Test the enrich function with all processes to ensure it processes correctly."""
         result = enrich(self.df.copy())
         self.assertIn('furigana', result.columns)
         self.assertIn('legal_entity', result.columns)
         self.assertIn('post_code', result.columns)
+        self.assertIn('address_key', result.columns)
+
+    def test_enrich_executors(self):
+        """Test that the thread and process executors give the same result as serial processing."""
+        expected = enrich(self.df.copy(), executor='serial')
+        for executor in ['thread', 'process']:
+            result = enrich(self.df.copy(), executor=executor, n_workers=2)
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_enrich_categorical_columns(self):
+        """Test that low-cardinality columns are categorical and stay so across process chunks."""
+        df = pd.DataFrame({'kind': ['301', '301', '101', None], 'city_name': ['米子市', '米子市', '安来市', 'ｙｏｎａｇｏ'],
+                           'name': ['ＡＢＣ', 'ＡＢＣ', 'DEF', None]}, index=[10, 11, 12, 13])
+        expected = enrich(df.copy(), 'standardization', 'enrich_kind', executor='serial')
+        self.assertIsInstance(expected['legal_entity'].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(expected['legal_entity'][:3]), ['株式会社', '株式会社', '国の機関'])
+        self.assertTrue(pd.isna(expected['legal_entity'][13]))
+        self.assertIsInstance(expected['city_name'].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(expected['city_name'].cat.categories), ['yonago', '安来市', '米子市'])
+        self.assertEqual(expected['name'].dtype, object)
+
+        result = enrich(df.copy(), 'standardization', 'enrich_kind', executor='process', n_workers=2)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_enrich_with_unknown_executor(self):
+        """Test that an unknown executor is rejected."""
+        with self.assertRaises(ValueError):
+            enrich(self.df.copy(), executor='gpu')
 
     def test_enrich_with_invalid_process(self):
         """Test the enrich function with an invalid process name to ensure it returns the original DataFrame unchanged and raises a warning."""
         with self.assertWarns(Warning) as warning:
             result = enrich(self.df.copy(), 'enrich_error')
             self.assertEqual(str(warning.warnings[0].message), "No valid function name enrich_error. Skip enrich_error processing.")
+        pd.testing.assert_frame_equal(result, self.df)
+
+    def test_partial_enrichment(self):
+        """Test that only the requested processes and the columns they need are processed."""
+        raw = read_csv('./test/data/31_tottori_test_20240329.csv')
+        result = enrich(raw.copy(), 'enrich_kind')
+        self.assertIn('legal_entity', result.columns)
+        self.assertEqual(result.iloc[0]['street_number'], raw.iloc[0]['street_number'])
+        self.assertEqual(result.iloc[0]['post_code'], '6800011')
+
+        result = enrich(raw.copy(), 'enrich_kana')
+        self.assertEqual(result.iloc[2]['name'], '株式会社souvenir')
+        self.assertEqual(result.iloc[0]['street_number'], raw.iloc[0]['street_number'])
+
+    def test_plan_explain(self):
+        """Test that the plan lists the stages with the columns they read and write."""
+        explain = plan_enrich('enrich_post_code', 'enrich_kana').explain().splitlines()
+        self.assertEqual(explain, [
+            '1. standardization: reads name, furigana -> writes name, furigana',
+            '2. enrich_kana: reads name, furigana -> writes furigana',
+            '3. enrich_post_code: reads post_code -> writes post_code',
+        ])
+        self.assertEqual(len(plan_enrich().stages), 5)
 
 if __name__ == '__main__':
     unittest.main()
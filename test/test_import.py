@@ -0,0 +1,36 @@
+""" test_import.py
+"""
+import json
+import subprocess
+import sys
+import unittest
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import pandas, requests, bs4
+dependencies = time.perf_counter()
+import cnparser
+end = time.perf_counter()
+print(json.dumps({"seconds": end - dependencies, "modules": sorted(sys.modules)}))
+"""
+
+class TestImport(unittest.TestCase):
+    def _import(self):
+        """Imports cnparser in a new interpreter and returns its import time and modules."""
+        output = subprocess.run([sys.executable, '-c', SCRIPT], capture_output=True, text=True, check=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_lazy_initialization(self):
+        """Test that importing cnparser does not load pandarallel, pykakasi or pkg_resources."""
+        modules = self._import()["modules"]
+        for module in ['pandarallel', 'pykakasi', 'pkg_resources']:
+            self.assertNotIn(module, modules)
+
+    def test_import_time(self):
+        """Test that importing cnparser takes little time on top of its dependencies."""
+        seconds = min(self._import()["seconds"] for _ in range(3))
+        self.assertLess(seconds, 0.3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+""" test_index.py
+"""
+import os
+import tempfile
+import unittest
+
+from cnparser.index import CorporateIndex, validate_corporate_number
+from cnparser.load import read_csv
+
+class TestCorporateIndex(unittest.TestCase):
+    def setUp(self):
+        """Build an index over the test data with a successor chain."""
+        self.df = read_csv('./test/data/31_tottori_test_20240329.csv')
+        self.df.loc[1, 'successor_corporate_number'] = self.df.loc[2, 'corporate_number']
+        self.df.loc[2, 'successor_corporate_number'] = self.df.loc[3, 'corporate_number']
+        self.index = CorporateIndex(self.df)
+
+    def test_get(self):
+        """Test that a number resolves to its row and an unknown number to None."""
+        self.assertEqual(self.index.get('1280001002413')['name'], '島田商事株式会社')
+        self.assertIsNone(self.index.get('1111111111111'))
+
+    def test_get_many(self):
+        """Test that batch lookups keep the query order and mark missing numbers."""
+        numbers = ['1280001007263', '1111111111111', '1000013050238', None]
+        result = self.index.get_many(numbers)
+        self.assertEqual(list(result.index), numbers)
+        self.assertEqual(result.iloc[0]['name'], self.df.loc[2, 'name'])
+        self.assertTrue(result.iloc[1].isna().all())
+        self.assertEqual(result.iloc[2]['name'], self.df.loc[0, 'name'])
+        self.assertTrue(result.iloc[3].isna().all())
+
+    def test_validate(self):
+        """Test the check digit of corporate numbers."""
+        result = validate_corporate_number(list(self.df['corporate_number']) + ['2000013050238', '123', None])
+        self.assertEqual(list(result), [True] * 5 + [False, False, False])
+
+    def test_resolve_successors(self):
+        """Test that successor chains are followed to their last number."""
+        numbers = list(self.df['corporate_number'][:2]) + ['1111111111111']
+        result = self.index.resolve_successors(numbers)
+        self.assertEqual(list(result), [numbers[0], self.df.loc[3, 'corporate_number'], '1111111111111'])
+
+    def test_save_and_load(self):
+        """Test that a saved index gives the same lookups."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'index.npz')
+            self.index.save(path)
+            loaded = CorporateIndex.load(path, self.df)
+        self.assertEqual(list(loaded.locate(self.df['corporate_number'])), [0, 1, 2, 3, 4])
+
+    def test_load_rejects_other_rows(self):
+        """Test that a saved index is not attached to a filtered or reordered DataFrame."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'index.npz')
+            self.index.save(path)
+            for df in [self.df.iloc[::-1].iloc[:3], self.df.iloc[::-1], self.df.iloc[:4]]:
+                with self.assertRaises(ValueError):
+                    CorporateIndex.load(path, df)
+
+if __name__ == '__main__':
+    unittest.main()
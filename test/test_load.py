@@ -1,9 +1,46 @@
 """ test_load.py
 """
+import io
 import unittest
 import json
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
 import pandas as pd
-from cnparser.load import load, read_csv
+from cnparser.load import load, load_diff, read_csv, iter_load, iter_read_csv, ZipLoader, DiffLoader, _discovered_file_ids, _split_ranges
+from cnparser.utility import load_config
+
+TEST_CSV = './test/data/31_tottori_test_20240329.csv'
+
+def _zip_bytes():
+    """Build an NTA-style zip archive containing the test CSV and a signature file."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.write(TEST_CSV, '31_tottori_all_20240329.csv')
+        archive.writestr('31_tottori_all_20240329.asc', 'signature')
+    return buffer.getvalue()
+
+class FakeResponse():
+    """Minimal stand-in for a streamed requests.Response."""
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = '<input type="hidden" name="{}" value="token">'.format(
+            "jp.go.nta.houjin_bangou.framework.web.common.CNSFWTokenProcessor.request.token")
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
 
 class TestLoadFunctions(unittest.TestCase):
     def setUp(self):
@@ -31,5 +68,145 @@ class TestLoadFunctions(unittest.TestCase):
         self.assertEqual(result.iloc[0]['corporate_number'], '1000013050238')
         self.assertEqual(result.iloc[1]['name'], '島田商事株式会社')
 
+    def test_read_csv_compact(self):
+        """Test the read_csv function with the compact schema."""
+        result = read_csv(TEST_CSV, schema='compact')
+
+        # Validate results
+        self.assertEqual(list(result.columns), self.expected_columns)
+        self.assertIsInstance(result['kind'].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(result['update_date']))
+        self.assertEqual(result.iloc[0]['update_date'], pd.Timestamp('2018-04-02'))
+        self.assertEqual(result.iloc[0]['corporate_number'], '1000013050238')
+        self.assertEqual(result.iloc[0]['post_code'], '6800011')
+        self.assertTrue(pd.isna(result.iloc[1]['post_code']))
+
+    def test_read_csv_parallel(self):
+        """Test that parsing byte ranges in processes gives the same DataFrame as one read_csv."""
+        for schema in ['object', 'compact']:
+            pd.testing.assert_frame_equal(read_csv(TEST_CSV, schema=schema, n_workers=3),
+                                          read_csv(TEST_CSV, schema=schema))
+
+    def test_split_ranges_outside_quotes(self):
+        """Test that byte ranges end at newlines outside quoted fields."""
+        lines = ['1,"a\nb",x\n', '2,"c""\n""d",y\n', '3,e,z\n'] * 20
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as file:
+            file.write(''.join(lines))
+        self.addCleanup(os.remove, file.name)
+        with open(file.name, 'rb') as data:
+            content = data.read()
+        for count in range(1, 12):
+            ranges = _split_ranges(file.name, count)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], len(content))
+            for start, end in ranges:
+                self.assertEqual(content[start:end].count(b'"') % 2, 0)
+                self.assertEqual(content[end - 1:end], b'\n')
+
+    def test_iter_read_csv(self):
+        """Test the iter_read_csv function yields header-named batches."""
+        batches = list(iter_read_csv(TEST_CSV, chunksize=2))
+
+        # Validate results
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        for batch in batches:
+            self.assertEqual(list(batch.columns), self.expected_columns)
+        self.assertEqual(batches[2].iloc[0]['corporate_number'], read_csv(TEST_CSV).iloc[4]['corporate_number'])
+
+class TestZipLoader(unittest.TestCase):
+    def setUp(self):
+        """Replace the network calls of ZipLoader with a local zip archive."""
+        with open('cnparser/config/header.json', 'r') as file:
+            self.expected_columns = json.load(file)
+        response = FakeResponse(_zip_bytes())
+        patchers = [mock.patch('requests.Session.get', return_value=response),
+                    mock.patch('requests.Session.post', return_value=response),
+                    mock.patch('cnparser.load.CHUNK_SIZE', 64),
+                    mock.patch.dict('cnparser.load._discovered_file_ids', clear=True)]
+        self.get, self.post, _, _ = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_zip_load(self):
+        """Test that zip_load streams the archive and parses the CSV member."""
+        result = ZipLoader().zip_load('00000')
+        self.assertEqual(list(result.columns), self.expected_columns)
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result.iloc[1]['name'], '島田商事株式会社')
+
+    def test_zip_load_parallel(self):
+        """Test that zip_load parses the extracted CSV member in worker processes."""
+        result = ZipLoader(parse_workers=2).zip_load('00000')
+        pd.testing.assert_frame_equal(result, ZipLoader().zip_load('00000'))
+
+    def test_zip_load_many_parallel_does_not_fork(self):
+        """Test that parse workers started from the threads of zip_load_many are not forked."""
+        with mock.patch('cnparser.load.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool:
+            frames = ZipLoader(parse_workers=2).zip_load_many({'Tottori': '00000', 'Shimane': '00001'}, max_workers=2)
+        self.assertEqual([len(frame) for frame in frames.values()], [5, 5])
+        self.assertEqual(pool.call_count, 2)
+        for call in pool.call_args_list:
+            self.assertNotEqual(call.kwargs['mp_context'].get_start_method(), 'fork')
+
+    def test_iter_zip_load(self):
+        """Test that iter_zip_load yields DataFrames of the requested size."""
+        batches = list(ZipLoader().iter_zip_load('00000', chunksize=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[0].iloc[0]['corporate_number'], '1000013050238')
+
+    def test_load_many(self):
+        """Test that a list of prefectures is loaded with one token request."""
+        frames = load(['Tottori', 'Shimane'], as_dict=True)
+        self.assertEqual(self.get.call_count, 1)
+        self.assertEqual(self.post.call_count, 2)
+        self.assertEqual(list(frames), ['Tottori', 'Shimane'])
+        self.assertEqual(len(frames['Shimane']), 5)
+
+        result = load(['Tottori', 'Shimane'], max_workers=2)
+        self.assertEqual(list(result.columns), self.expected_columns)
+        self.assertEqual(len(result), 10)
+
+    def test_load_diff(self):
+        """Test that DiffLoader reads the file IDs of the difference files from the page."""
+        page = FakeResponse(b'')
+        page.text += (
+            '<div class="inBox21"><div class="tbl02"></div><div class="tbl02">'
+            '<dl><dt class="mb05">令和6年3月28日 (2024年3月28日)</dt><dd><a onclick="return doDownload(25101);">zip</a></dd></dl>'
+            '<dl><dt class="mb05">令和6年3月29日 (2024年3月29日)</dt><dd><a onclick="return doDownload(25102);">zip</a></dd></dl>'
+            '</div></div>')
+        self.get.return_value = page
+        self.assertEqual(DiffLoader().file_ids, {'2024-03-28': '25101', '2024-03-29': '25102'})
+
+        result = load_diff()
+        self.assertEqual(self.post.call_args.kwargs['params']['selDlFileNo'], '25102')
+        self.assertEqual(len(result), 5)
+
+    def test_file_ids_from_page(self):
+        """Test that the file IDs on the download page replace file_id.json and are reused offline."""
+        page = FakeResponse(b'')
+        page.text += (
+            '<div class="inBox21"><div class="tbl02"></div><div class="tbl02">'
+            '<dl><dt class="mb05">全国</dt><dd><a onclick="return doDownload(30001);">zip</a></dd></dl>'
+            '<dl><dt class="mb05">鳥取県</dt><dd><a onclick="return doDownload(30032);">zip</a></dd></dl>'
+            '</div></div>')
+        self.get.return_value = page
+        with tempfile.TemporaryDirectory() as directory:
+            loader = ZipLoader(cache=directory)
+            self.assertEqual(loader.file_ids, {'All': '30001', 'Tottori': '30032'})
+            load('tottori', cache=directory)
+            self.assertEqual(self.post.call_args.kwargs['params']['selDlFileNo'], '30032')
+            self.assertEqual(loader.file_id('Shimane'), load_config('file_id')['Shimane'])
+
+            _discovered_file_ids.clear()
+            self.assertEqual(ZipLoader(cache=directory, offline=True).file_id('Tottori'), '30032')
+            with mock.patch('cnparser.load.FILE_ID_TTL', -1):
+                self.get.return_value = FakeResponse(b'')
+                self.assertEqual(ZipLoader(cache=directory).file_id('Tottori'), load_config('file_id')['Tottori'])
+
+    def test_iter_load(self):
+        """Test that iter_load yields batches for a prefecture."""
+        batches = list(iter_load('Tottori', chunksize=3))
+        self.assertEqual([len(batch) for batch in batches], [3, 2])
+
 if __name__ == '__main__':
     unittest.main()
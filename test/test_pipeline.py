@@ -0,0 +1,66 @@
+""" test_pipeline.py
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from cnparser.__main__ import main
+from cnparser.executor import run_chunked
+from cnparser.pipeline import report, run_pipeline
+from test.test_load import FakeResponse, _zip_bytes
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        """Replace the network calls of ZipLoader with a local zip archive."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        response = FakeResponse(_zip_bytes())
+        patchers = [mock.patch('requests.Session.get', return_value=response),
+                    mock.patch('requests.Session.post', return_value=response),
+                    mock.patch.dict('cnparser.load._discovered_file_ids', clear=True)]
+        self.get, self.post, _ = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_run_pipeline(self):
+        """Test that each prefecture goes through every stage and is written to its own file."""
+        stats = run_pipeline(['Tottori', 'Shimane'], output=self.tmp_dir.name, processes=['enrich_kind'],
+                             file_format='csv', workers={'download': 2, 'parse': 2})
+        for prefecture in ['Tottori', 'Shimane']:
+            result = pd.read_csv(os.path.join(self.tmp_dir.name, f'{prefecture}.csv'), dtype=str)
+            self.assertEqual(len(result), 5)
+            self.assertEqual(result.iloc[0]['legal_entity'], '国の機関')
+
+        frame = stats.to_frame()
+        self.assertEqual(sorted(frame.groupby('stage').size().to_dict().items()),
+                         [('download', 2), ('enrich', 2), ('parse', 2), ('write', 2)])
+        self.assertEqual(frame[frame['stage'] == 'parse']['rows'].sum(), 10)
+        self.assertIn('total wall time', report(stats))
+
+    def test_run_pipeline_process_executor(self):
+        """Test that enrich processes are not forked from the threads of the pipeline."""
+        with mock.patch('cnparser.enrich.run_chunked', wraps=run_chunked) as chunked:
+            run_pipeline(['Tottori'], output=self.tmp_dir.name, processes=['enrich_kind'], file_format='csv',
+                         executor='process')
+        self.assertNotEqual(chunked.call_args.kwargs['mp_context'].get_start_method(), 'fork')
+        result = pd.read_csv(os.path.join(self.tmp_dir.name, 'Tottori.csv'), dtype=str)
+        self.assertEqual(result.iloc[0]['legal_entity'], '国の機関')
+
+    def test_run_pipeline_failure(self):
+        """Test that a failed stage stops the run with SystemExit instead of blocking."""
+        self.post.return_value = FakeResponse(b'', status_code=500)
+        with self.assertRaises(SystemExit):
+            run_pipeline(['Tottori', 'Shimane', 'Tokyo'], output=self.tmp_dir.name, file_format='csv', queue_size=1)
+
+    def test_main(self):
+        """Test the command line with all enrich processes."""
+        with mock.patch('sys.stderr'):
+            status = main(['Tottori', '--enrich', '--format', 'csv', '--output', self.tmp_dir.name])
+        self.assertEqual(status, 0)
+        result = pd.read_csv(os.path.join(self.tmp_dir.name, 'Tottori.csv'), dtype=str)
+        self.assertIn('furigana', result.columns)
+
+if __name__ == '__main__':
+    unittest.main()
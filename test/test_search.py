@@ -0,0 +1,43 @@
+""" test_search.py
+"""
+import tempfile
+import unittest
+
+from cnparser.enrich import enrich
+from cnparser.load import read_csv
+from cnparser.search import NameIndex
+
+class TestNameIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Build an index over the enriched test data."""
+        cls.df = enrich(read_csv('./test/data/31_tottori_test_20240329.csv'))
+        cls.index = NameIndex.build(cls.df)
+
+    def test_search_name(self):
+        """Test that a name without its legal entity finds the company first."""
+        result = self.index.search('島田商事')
+        self.assertEqual(result.iloc[0]['corporate_number'], '1280001002413')
+        self.assertEqual(result.iloc[0]['score'], 1.0)
+
+    def test_search_kana_and_english(self):
+        """Test that furigana and English names are searched."""
+        self.assertEqual(self.index.search('シマダショウジ').iloc[0]['position'], 1)
+        self.assertEqual(self.index.search('Tottori Summary Court').iloc[0]['position'], 0)
+
+    def test_search_many_with_filters(self):
+        """Test batch queries with a prefecture filter and top-k."""
+        result = self.index.search_many(['鳥取簡易裁判所', 'HAP観光'], k=1, prefecture_code='32')
+        self.assertLessEqual(len(result), 2)
+        self.assertNotIn(0, list(result['position']))
+        self.assertEqual(list(result[result['query'] == 'HAP観光']['position']), [4])
+
+    def test_save_and_load(self):
+        """Test that a memory-mapped index gives the same results."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.index.save(tmp_dir)
+            loaded = NameIndex.load(tmp_dir)
+            self.assertTrue(loaded.search('HAP観光', kind='302').equals(self.index.search('HAP観光', kind='302')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+""" test_snapshot.py
+"""
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+import pyarrow as pa
+from cnparser.enrich import enrich_kind
+from cnparser.load import read_csv
+from cnparser.snapshot import open_snapshot, save_snapshot
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        """Load and enrich the test data and create a temporary directory."""
+        self.df = enrich_kind(read_csv('./test/data/31_tottori_test_20240329.csv'))
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_round_trip(self):
+        """Test that both formats restore the data with categorical columns."""
+        for file_name in ['snapshot.parquet', 'snapshot.feather']:
+            path = os.path.join(self.tmp_dir.name, file_name)
+            save_snapshot(self.df, path)
+            result = open_snapshot(path)
+            self.assertEqual(list(result.columns), list(self.df.columns))
+            self.assertIsInstance(result['legal_entity'].dtype, pd.CategoricalDtype)
+            self.assertEqual(result.iloc[0]['corporate_number'], '1000013050238')
+            self.assertEqual(list(result['legal_entity'].astype(object)), list(self.df['legal_entity']))
+
+    def test_arrow_backed_strings(self):
+        """Test that string columns are Arrow-backed and wrap the memory-mapped Feather buffers."""
+        for file_name in ['snapshot.parquet', 'snapshot.feather']:
+            path = os.path.join(self.tmp_dir.name, file_name)
+            save_snapshot(self.df, path)
+            result = open_snapshot(path)
+            for column in ['corporate_number', 'name', 'street_number']:
+                self.assertIsInstance(result[column].dtype, pd.ArrowDtype)
+                self.assertTrue(pa.types.is_string(result[column].dtype.pyarrow_dtype))
+            self.assertEqual(result['name'][1], '島田商事株式会社')
+
+        allocated = pa.total_allocated_bytes()
+        result = open_snapshot(path, columns=['name', 'street_number'])
+        self.assertEqual(pa.total_allocated_bytes(), allocated)
+        self.assertEqual(len(result), len(self.df))
+
+    def test_projection_and_filters(self):
+        """Test that columns are projected and rows are filtered by prefecture."""
+        for file_name in ['snapshot.parquet', 'snapshot.feather']:
+            path = os.path.join(self.tmp_dir.name, file_name)
+            save_snapshot(self.df, path)
+            result = open_snapshot(path, columns=['corporate_number', 'name'],
+                                   filters=[('prefecture_code', '==', '32')])
+            self.assertEqual(list(result.columns), ['corporate_number', 'name'])
+            self.assertEqual(len(result), 4)
+
+if __name__ == '__main__':
+    unittest.main()
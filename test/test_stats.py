@@ -0,0 +1,92 @@
+""" test_stats.py
+"""
+import tracemalloc
+import unittest
+from unittest import mock
+
+from cnparser.enrich import enrich, standardization
+from cnparser.load import ZipLoader, read_csv
+from cnparser.stats import Stats, count, measure
+from test.test_load import FakeResponse, _zip_bytes
+
+TEST_CSV = './test/data/31_tottori_test_20240329.csv'
+
+class TestStats(unittest.TestCase):
+    def test_stage_records_time_and_counters(self):
+        """Test that a stage records its time, initial counters and counted values."""
+        received = []
+        stats = Stats(hooks=[received.append])
+        with stats.stage('parse', rows=5) as record:
+            count('cache_hits', 2)
+            record['bytes'] = 10
+        count('cache_hits')
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(received, stats.records)
+        self.assertEqual(received[0]['rows'], 5)
+        self.assertEqual(received[0]['cache_hits'], 2)
+        self.assertGreaterEqual(received[0]['seconds'], 0)
+
+    def test_measure_without_stats(self):
+        """Test that measuring without a Stats records nothing."""
+        with measure(None, 'parse') as record:
+            count('rows', 5)
+        self.assertEqual(record, {})
+
+    def test_trace_memory_and_summary(self):
+        """Test that the peak memory is recorded and the summary totals each stage."""
+        stats = Stats(trace_memory=True)
+        for _ in range(2):
+            with stats.stage('build', rows=3):
+                data = [0] * 100000
+        del data
+        summary = stats.summary()
+        self.assertEqual(summary.loc['build', 'calls'], 2)
+        self.assertEqual(summary.loc['build', 'rows'], 6)
+        self.assertGreaterEqual(summary.loc['build', 'peak_memory'], 800000)
+
+    def test_trace_memory_stops_tracing(self):
+        """Test that tracing started for traced stages, nested or not, is stopped after them."""
+        stats = Stats(trace_memory=True)
+        with stats.stage('outer'):
+            with stats.stage('inner'):
+                self.assertTrue(tracemalloc.is_tracing())
+            self.assertTrue(tracemalloc.is_tracing())
+        self.assertFalse(tracemalloc.is_tracing())
+
+        enrich(standardization(read_csv(TEST_CSV)), 'enrich_kind', executor='serial', stats=stats)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        tracemalloc.start()
+        try:
+            with stats.stage('build'):
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+class TestInstrumentation(unittest.TestCase):
+    def test_zip_loader_stages(self):
+        """Test that the loader measures the token, download, uncompress and parse stages."""
+        content = _zip_bytes()
+        stats = Stats()
+        with mock.patch('requests.Session.get', return_value=FakeResponse(b'')), \
+                mock.patch('requests.Session.post', return_value=FakeResponse(content)):
+            ZipLoader(stats=stats).zip_load('00000')
+        records = {record['stage']: record for record in stats}
+        self.assertEqual(list(records), ['token', 'download', 'uncompress', 'parse'])
+        self.assertEqual(records['download']['bytes'], len(content))
+        self.assertGreater(records['uncompress']['bytes'], 0)
+        self.assertEqual(records['parse']['rows'], 5)
+
+    def test_enrich_stages(self):
+        """Test that each enrich stage is measured on each chunk, also in worker processes."""
+        df = standardization(read_csv(TEST_CSV))
+        for executor in ['serial', 'process']:
+            stats = Stats()
+            enrich(df.copy(), 'enrich_kind', 'enrich_post_code', executor=executor, n_workers=2, stats=stats)
+            summary = stats.summary()
+            self.assertEqual(list(summary.index), ['enrich_kind', 'enrich_post_code'])
+            self.assertEqual(summary.loc['enrich_kind', 'rows'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+""" test_update.py
+"""
+import unittest
+import warnings
+
+import pandas as pd
+from cnparser.enrich import enrich
+from cnparser.load import read_csv
+from cnparser.update import apply_updates
+
+class TestApplyUpdates(unittest.TestCase):
+    def setUp(self):
+        """Build a snapshot from the test data and a difference file changing it."""
+        self.snapshot = read_csv('./test/data/31_tottori_test_20240329.csv')
+        renamed = self.snapshot.iloc[[1, 1]].copy()
+        renamed['sequence_number'] = ['11', '10']
+        renamed['process'] = '11'
+        renamed['name'] = ['島田商事株式会社（新）', '島田商事株式会社（旧）']
+        history = self.snapshot.iloc[[0]].copy()
+        history['sequence_number'] = '12'
+        history['latest'] = '0'
+        history['name'] = '鳥取地方裁判所'
+        deleted = self.snapshot.iloc[[2]].copy()
+        deleted['sequence_number'] = '13'
+        deleted['process'] = '99'
+        created = self.snapshot.iloc[[3]].copy()
+        created['sequence_number'] = '14'
+        created['process'] = '01'
+        created['corporate_number'] = '9999999999999'
+        self.diff = pd.concat([renamed, history, deleted, created], ignore_index=True)
+
+    def test_apply_updates(self):
+        """Test that the latest records are upserted and deleted records are removed."""
+        result = apply_updates(self.snapshot, self.diff, enrich_rows=False)
+        names = result.set_index('corporate_number')['name']
+        self.assertEqual(len(result), 5)
+        self.assertEqual(names['1280001002413'], '島田商事株式会社（新）')
+        self.assertEqual(names['1000013050238'], '鳥取簡易裁判所')
+        self.assertNotIn('1280001007263', names.index)
+        self.assertIn('9999999999999', names.index)
+
+    def test_apply_updates_blank_sequence_number(self):
+        """Test that a record without a sequence number is applied last rather than dropped."""
+        blank = self.snapshot.iloc[[4]].copy()
+        blank['sequence_number'] = ''
+        blank['process'] = '11'
+        blank['name'] = '有限会社HAP観光（新）'
+        diff = pd.concat([blank, self.diff], ignore_index=True)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', FutureWarning)
+            result = apply_updates(self.snapshot, diff, enrich_rows=False)
+        names = result.set_index('corporate_number')['name']
+        self.assertEqual(len(result), 5)
+        self.assertEqual(names[blank.iloc[0]['corporate_number']], '有限会社HAP観光（新）')
+        self.assertEqual(names['1280001002413'], '島田商事株式会社（新）')
+        self.assertIn('9999999999999', names.index)
+
+    def test_apply_updates_enriches_changed_rows(self):
+        """Test that only the changed records are enriched."""
+        result = apply_updates(self.snapshot, self.diff, 'enrich_kind')
+        entities = result.set_index('corporate_number')['legal_entity']
+        self.assertEqual(entities['1280001002413'], '株式会社')
+        self.assertTrue(pd.isna(entities['1000013050238']))
+
+    def test_apply_updates_keeps_categories(self):
+        """Test that categorical columns of an enriched snapshot stay categorical."""
+        snapshot = enrich(self.snapshot.copy(), 'enrich_kind')
+        result = apply_updates(snapshot, self.diff, 'enrich_kind')
+        self.assertIsInstance(result['legal_entity'].dtype, pd.CategoricalDtype)
+        self.assertEqual(result.set_index('corporate_number')['legal_entity']['1280001002413'], '株式会社')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+""" test_utility.py
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cnparser import utility
+from cnparser.utility import add_config_dir, clear_config_cache, compiled_config, load_config
+
+def _write(path, value):
+    with open(path, 'w', encoding='UTF-8') as file:
+        json.dump(value, file)
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        """Start from an empty config cache without override directories."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.addCleanup(clear_config_cache)
+        self.addCleanup(utility._config_dirs.clear)
+        clear_config_cache()
+
+    def test_load_once(self):
+        """Test that a loaded config is shared and read without touching the filesystem."""
+        header = load_config('header')
+        with mock.patch('builtins.open', side_effect=AssertionError), \
+                mock.patch('os.stat', side_effect=AssertionError):
+            self.assertIs(load_config('header'), header)
+
+    def test_override_and_reload(self):
+        """Test that an override directory takes precedence and a changed file is read again."""
+        path = os.path.join(self.tmp_dir.name, 'kind.json')
+        _write(path, {'301': 'KK'})
+        add_config_dir(self.tmp_dir.name)
+        self.assertEqual(load_config('kind'), {'301': 'KK'})
+
+        _write(path, {'301': 'Kabushiki Kaisha'})
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(load_config('kind'), {'301': 'KK'})
+        with mock.patch.object(utility, 'CONFIG_CHECK_INTERVAL', 0):
+            self.assertEqual(load_config('kind'), {'301': 'Kabushiki Kaisha'})
+
+    def test_compiled_config(self):
+        """Test that an artifact is built once and rebuilt when its config is read again."""
+        build = mock.Mock(side_effect=lambda kinds, suffix: len(kinds) + suffix)
+        first = compiled_config(build, ('kind',), 1)
+        self.assertEqual(compiled_config(build, ('kind',), 1), first)
+        self.assertEqual(build.call_count, 1)
+        clear_config_cache()
+        compiled_config(build, ('kind',), 1)
+        self.assertEqual(build.call_count, 2)
+
+    def test_missing_config(self):
+        """Test that a missing config file exits."""
+        with self.assertRaises(SystemExit):
+            load_config('missing')
+
+if __name__ == '__main__':
+    unittest.main()